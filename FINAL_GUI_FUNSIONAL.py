@@ -3,21 +3,29 @@ import os
 import random
 import json
 import csv
+import time
 from datetime import datetime, timedelta
 import sqlite3
 import numpy as np
 import neurokit2 as nk
 
-# MQTT
-import paho.mqtt.client as mqtt
+# Source data (MQTT, serial, simulator, replay)
+import data_sources
+from data_sources import DataDispatcher, LatestValueMailbox, create_sources
+from charts import (
+    SweepTrace, FrameBudget, WaveformChannel, cached_signal, simulate_capnogram
+)
+from instrumentation import Instrumentation
+from ecg_model import BeatStream, QRSDetector, Scenario
 
 # PyQt5 imports
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem,
     QHeaderView, QMainWindow, QApplication, QMessageBox,
-    QComboBox, QPushButton, QFileDialog
+    QComboBox, QPushButton, QFileDialog, QShortcut, QLabel, QFrame, QHBoxLayout
 )
-from PyQt5.QtCore import QTimer, QTime, QDate, QObject, pyqtSignal
+from PyQt5.QtCore import Qt, QTimer, QTime, QDate, QEvent, QObject, pyqtSignal
+from PyQt5.QtGui import QColor, QKeySequence
 from PyQt5 import QtWidgets, uic
 
 # Matplotlib imports
@@ -25,7 +33,7 @@ import pyqtgraph as pg
 from pyqtgraph import PlotWidget
 
 # Threading
-from threading import Thread
+from threading import Lock, Thread
 
 
 def save_login_time():
@@ -41,33 +49,309 @@ def get_login_time():
     except (FileNotFoundError, json.JSONDecodeError):
         return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-class MQTTClient(QObject):
-    data_received = pyqtSignal(dict)
-    
-    def __init__(self):
-        super().__init__()
-        self.client = mqtt.Client()
-        self.client.on_connect = self.on_connect
-        self.client.on_message = self.on_message
-        
-    def on_connect(self, client, userdata, flags, rc):
-        print("Connected with result code "+str(rc))
-        client.subscribe("monitoring/parameter")
-        
-    def on_message(self, client, userdata, msg):
-        try:
-            import json
-            data = json.loads(msg.payload.decode())
-            self.data_received.emit(data)
-        except Exception as e:
-            print(f"Error processing message: {e}")
-            
-    def start(self):
-        self.client.connect("broker.emqx.io", 1883, 60)
-        Thread(target=self.client.loop_forever, daemon=True).start()
+# Lama alarm device tetap tampil setelah diterima (detik)
+DEVICE_ALARM_HOLD = 10
+
+# Interval update panel vital signs (ms), tidak tergantung laju pesan device
+DISPLAY_INTERVAL_MS = 1000
+
+# Central station: riwayat bed_vital_signs disimpan BED_RETENTION_HOURS jam,
+# baris lebih lama dihapus tiap BED_PRUNE_INTERVAL detik (dalam commit batch)
+BED_RETENTION_HOURS = 24
+BED_PRUNE_INTERVAL = 60
+
+# Grafik ECG: sampling rate waveform (Hz), panjang window (detik) dan interval frame (ms).
+# Jumlah sampel per frame mengikuti waktu sebenarnya, bukan jumlah tick timer
+ECG_SAMPLING_RATE = 250
+CHART_WINDOW_SECONDS = 2
+CHART_INTERVAL_MS = 33
+# Ingest waveform simulasi + deteksi QRS, terpisah dari render agar HR/alarm tetap
+# jalan saat window tersembunyi (interval lebih jarang, jumlah sampel tetap sesuai waktu)
+WAVEFORM_HIDDEN_INTERVAL_MS = 250
+# Pilihan window per lead (detik) dan sweep speed (mm/s) di menu klik kanan grafik.
+# Sweep speed menentukan window dari lebar fisik plot, dibatasi CHART_WINDOW_MIN..MAX
+CHART_WINDOW_CHOICES = (2, 4, 6, 8, 10)
+CHART_WINDOW_MIN = 1
+CHART_WINDOW_MAX = 10
+CHART_SWEEP_SPEEDS = (12.5, 25, 50)
+
+# Cache sinyal simulasi (.npy, memory-mapped) agar login berikutnya tidak menghitung ulang
+# ecg_simulate; MONITOR_SIM_CACHE kosong = tanpa cache
+SIM_CACHE_DIR = os.environ.get('MONITOR_SIM_CACHE', 'sim_cache')
+
+# Registry channel waveform, urutan = urutan grafik di layar.
+#   rate: sampling rate (Hz); window: detik (default CHART_WINDOW_SECONDS);
+#   scale: unit source -> unit tampilan; group: sumbu x bersama pada layout 'single';
+#   label: teks di samping grafik untuk channel tanpa frame di alldata.ui;
+#   lead: lead ekstremitas (ecg_model.LIMB_LEADS), disimulasikan BeatStream
+WAVEFORM_CHANNELS = {
+    'ecg1': {'title': "ECG Lead I", 'lead': 'I', 'rate': ECG_SAMPLING_RATE, 'y_range': (-1.5, 1.5), 'group': 'ecg'},
+    'ecg2': {'title': "ECG Lead II", 'lead': 'II', 'rate': ECG_SAMPLING_RATE, 'y_range': (-1.5, 1.5), 'group': 'ecg'},
+    'ecg3': {'title': "ECG Lead III", 'lead': 'III', 'rate': ECG_SAMPLING_RATE, 'y_range': (-1.5, 1.5), 'group': 'ecg'},
+    'pleth': {'title': "SpO2 Pleth", 'label': "PLETH", 'rate': 100, 'y_range': (-0.5, 2.5),
+              'pen': 'y'},
+    'co2': {'title': "CO2 Capnogram", 'label': "CO2", 'rate': 25, 'window': 8, 'y_range': (-2, 50),
+            'unit': 'mmHg', 'pen': 'w'},
+}
+# Skenario ritme untuk ECG simulasi (ecg_model.RHYTHMS), mis. "normal:60,af:120,vt:20";
+# kosong = ritme sinus mengikuti HR target
+SIM_SCENARIO = os.environ.get('MONITOR_SIM_SCENARIO')
+# Channel untuk deteksi QRS (HR/RR di panel vital dan alarm), lead II
+QRS_CHANNEL = 'ecg2'
+# Lead augmented (aVR, aVL, aVF) sebagai grafik tambahan, MONITOR_AUGMENTED_LEADS=1
+if os.environ.get('MONITOR_AUGMENTED_LEADS') == '1':
+    for _name, _lead in (('avr', 'aVR'), ('avl', 'aVL'), ('avf', 'aVF')):
+        WAVEFORM_CHANNELS[_name] = {'title': f"ECG Lead {_lead}", 'label': f"ECG {_lead}", 'lead': _lead,
+                                    'rate': ECG_SAMPLING_RATE, 'y_range': (-1.5, 1.5), 'group': 'ecg'}
+    # Pleth dan CO2 tetap di bawah semua lead ECG
+    for _name in ('pleth', 'co2'):
+        WAVEFORM_CHANNELS[_name] = WAVEFORM_CHANNELS.pop(_name)
+# 'scroll': grafik bergeser; 'sweep': erase bar seperti monitor klinis (hanya area yang berubah digambar ulang)
+CHART_MODE = os.environ.get('MONITOR_CHART_MODE', 'scroll')
+# 'separate': satu PlotWidget per lead; 'single': semua lead dalam satu GraphicsLayoutWidget
+# (sumbu x bersama, satu scene). CHART_OPENGL memakai viewport OpenGL (butuh PyOpenGL)
+CHART_LAYOUT = os.environ.get('MONITOR_CHART_LAYOUT', 'separate')
+CHART_OPENGL = os.environ.get('MONITOR_CHART_OPENGL') == '1'
+# Budget waktu update grafik per frame (ms), overrun dihitung di chart_budget
+CHART_FRAME_BUDGET_MS = 10
+
+# Instrumentasi timer/paint: overlay (Ctrl+P) dan file dump (Ctrl+Shift+P, juga saat exit
+# jika MONITOR_PERF_FILE di-set)
+PERF_OVERLAY = os.environ.get('MONITOR_PERF_OVERLAY') == '1'
+PERF_FILE = os.environ.get('MONITOR_PERF_FILE')
+
+
+def evaluate_alarms(alarm_values, ecg=None, spo2=None, sys=None, dias=None,
+                    temp=None, co2=None, resp=None):
+    """Evaluate vital signs against alarm thresholds
+
+    Parameter yang None dilewati. Returns (critical_alerts, alert_text).
+    """
+    alert_text = []
+    critical_alerts = []
+
+    # Heart Rate
+    if ecg is not None:
+        if 0 <= ecg < 40:
+            critical_alerts.append("CRITICAL: Heart Rate <40 bpm!")
+        elif 40 <= ecg < alarm_values['HRlow']:
+            alert_text.append(f"Heart Rate Low! ({ecg} bpm)")
+        elif alarm_values['HRhigh'] < ecg <= 140:
+            alert_text.append(f"Heart Rate High! ({ecg} bpm)")
+        elif ecg > 140:
+            critical_alerts.append("CRITICAL: Heart Rate >140 bpm!")
+
+    # SpO2
+    if spo2 is not None:
+        if 0 <= spo2 <= 90:
+            critical_alerts.append("CRITICAL: SpO₂ ≤90%!")
+        elif 90 < spo2 < alarm_values['spO2low']:
+            alert_text.append(f"Warning: SpO₂ Low ({spo2}%)")
+        elif spo2 >= alarm_values['spO2high']:
+            alert_text.append(f"SpO₂ High ({spo2}%)")
+
+    # NIBP - Systolic
+    if sys is not None:
+        if 0 <= sys < 70:
+            critical_alerts.append("CRITICAL: Systolic BP <70 mmHg!")
+        elif 70 <= sys < alarm_values['sysLow']:
+            alert_text.append(f"Warning: Systolic BP Low {sys}mmHg)")
+        elif alarm_values['sysHigh'] < sys < 180:
+            alert_text.append(f"Warning: Systolic BP High {sys}mmHg)")
+        elif sys >= 180:
+            critical_alerts.append("CRITICAL: Systolic BP ≥180 mmHg!")
+
+    # NIBP - Diastolic
+    if dias is not None:
+        if 0 <= dias < 40:
+            critical_alerts.append("CRITICAL: Diastolic BP <40 mmHg!")
+        elif 70 <= dias < alarm_values['diasLow']:
+            alert_text.append(f"Warning: Diastolic BP Low {dias} mmHg)")
+        elif alarm_values['diasHigh'] < dias < 110:
+            alert_text.append(f"Warning: Diastolic BP High {dias} mmHg)")
+        elif dias >= 110:
+            critical_alerts.append("CRITICAL: Diastolic BP ≥110 mmHg!")
+
+    # Temperature
+    if temp is not None:
+        if 0 <= temp < 35.0:
+            critical_alerts.append("CRITICAL: Temperature <35°C!")
+        elif 35.0 <= temp < alarm_values['tempLow']:
+            alert_text.append(f"Warning: Temperature Low {temp}°C)")
+        elif alarm_values['tempHigh'] < temp < 40:
+            alert_text.append(f"Warning: Temperature High {temp}°C")
+        elif temp >= 40:
+            critical_alerts.append("CRITICAL: Temperature >40°C!")
+
+    # ETCO2
+    if co2 is not None:
+        if 0 <= co2 <= 30:
+            critical_alerts.append("CRITICAL: ETCO₂ <30 mmHg!")
+        elif 30 < co2 < alarm_values['etco2low']:
+            alert_text.append(f"Warning: ETCO₂ Low {co2} mmHg")
+        elif alarm_values['etco2High'] < co2 <= 50:
+            alert_text.append(f"Warning: ETCO₂ High {co2} mmHg")
+        elif co2 > 50:
+            critical_alerts.append("CRITICAL: ETCO₂ >50 mmHg!")
+
+    # Respiratory Rate
+    if resp is not None:
+        if resp < 6:
+            critical_alerts.append("CRITICAL: Respiratory Rate <6/min!")
+        elif 6 <= resp < alarm_values['respLow']:
+            alert_text.append(f"Respiratory Rate Low {resp}/min")
+        elif alarm_values['respHigh'] < resp <= 30:
+            alert_text.append(f"Respiratory Rate High {resp}/min")
+        elif resp > 30:
+            critical_alerts.append("CRITICAL: Respiratory Rate >30/min!")
+
+    return critical_alerts, alert_text
+
+
+class BedState:
+    """State satu bed di central station"""
+
+    def __init__(self, bed_id):
+        self.bed_id = bed_id
+        self.mailbox = LatestValueMailbox()
+        self.values = {}
+        self.critical_alerts = []
+        self.alert_text = []
+        self.last_update = None
+
+    def apply(self, data):
+        """Gabungkan snapshot baru ke nilai terakhir bed ini"""
+        for key in ('hr', 'spo2', 'resp', 'etco2', 'sys', 'dias'):
+            if key in data:
+                self.values[key] = round(float(data[key]))
+        if 'temp' in data:
+            self.values['temp'] = round(float(data['temp']), 1)
+        if 'nibp' in data and '/' in str(data['nibp']):
+            sys, dias = str(data['nibp']).split('/', 1)
+            self.values['sys'], self.values['dias'] = int(sys), int(dias)
+        self.last_update = datetime.now()
+
+    def evaluate(self, alarm_values):
+        if alarm_values.get('alarm_status', 'ON') == 'OFF':
+            self.critical_alerts, self.alert_text = [], []
+            return
+        v = self.values
+        self.critical_alerts, self.alert_text = evaluate_alarms(
+            alarm_values, ecg=v.get('hr'), spo2=v.get('spo2'), sys=v.get('sys'),
+            dias=v.get('dias'), temp=v.get('temp'), co2=v.get('etco2'), resp=v.get('resp')
+        )
+
+    @property
+    def nibp(self):
+        if 'sys' in self.values and 'dias' in self.values:
+            return f"{self.values['sys']}/{self.values['dias']}"
+        return "--/--"
+
+    @property
+    def status(self):
+        if self.critical_alerts:
+            return ", ".join(self.critical_alerts)
+        if self.alert_text:
+            return ", ".join(self.alert_text)
+        return "Normal"
+
+
+class WardMonitor:
+    """Route pesan per-bed ke BedState dan simpan ke database secara batch
+
+    `post` dipanggil dari dispatch thread (hanya menimpa mailbox bed),
+    `process` dipanggil dari timer GUI sekali per display interval.
+    """
+
+    def __init__(self, db_path='patient_data.db'):
+        self.beds = {}
+        self._lock = Lock()
+        self.db_path = db_path
+        self.conn = None
+        self.last_prune = None
+
+    def post(self, bed_id, data):
+        bed = self.beds.get(bed_id)
+        if bed is None:
+            with self._lock:
+                bed = self.beds.setdefault(bed_id, BedState(bed_id))
+        bed.mailbox.post(data)
+
+    def all_beds(self):
+        with self._lock:
+            return list(self.beds.values())
+
+    def setup_db(self):
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS bed_vital_signs (
+                bed TEXT,
+                timestamp TEXT,
+                ecg INTEGER,
+                spo2 INTEGER,
+                nibp TEXT,
+                resp INTEGER,
+                temp REAL,
+                co2 INTEGER
+            )
+        ''')
+        self.conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_bed_vital_signs
+            ON bed_vital_signs (bed, timestamp)
+        ''')
+        # Sisa sesi sebelumnya (termasuk bed yang sudah tidak aktif) dipangkas sekali di sini
+        self.conn.execute('DELETE FROM bed_vital_signs WHERE timestamp < ?', (self.retention_cutoff(),))
+        self.conn.commit()
+        self.last_prune = time.monotonic()
+
+    @staticmethod
+    def retention_cutoff():
+        return (datetime.now() - timedelta(hours=BED_RETENTION_HOURS)).strftime('%Y-%m-%d %H:%M:%S')
+
+    def process(self, alarm_values):
+        """Ambil snapshot semua bed, evaluasi alarm, simpan; returns bed yang berubah"""
+        beds = self.all_beds()
+        updated = []
+        rows = []
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for bed in beds:
+            snapshot = bed.mailbox.take()
+            if snapshot is None:
+                continue
+            try:
+                bed.apply(snapshot)
+            except (TypeError, ValueError) as e:
+                print(f"Error parsing data bed {bed.bed_id}: {e}")
+                continue
+            bed.evaluate(alarm_values)
+            updated.append(bed)
+            v = bed.values
+            rows.append((bed.bed_id, timestamp, v.get('hr'), v.get('spo2'), bed.nibp,
+                         v.get('resp'), v.get('temp'), v.get('etco2')))
+
+        if rows:
+            # Satu transaksi untuk semua bed
+            if self.conn is None:
+                self.setup_db()
+            with self.conn:
+                self.conn.executemany('''
+                    INSERT INTO bed_vital_signs (bed, timestamp, ecg, spo2, nibp, resp, temp, co2)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                now = time.monotonic()
+                if now - self.last_prune >= BED_PRUNE_INTERVAL:
+                    # Per bed agar memakai index (bed, timestamp)
+                    cutoff = self.retention_cutoff()
+                    self.conn.executemany('DELETE FROM bed_vital_signs WHERE bed = ? AND timestamp < ?',
+                                          [(bed.bed_id, cutoff) for bed in beds])
+                    self.last_prune = now
+        return updated
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
 
-    def stop(self):
-        self.disconnect()
 
 # Login Window Class
 class LoginWindow(QtWidgets.QMainWindow):
@@ -160,28 +444,73 @@ class LoginWindow(QtWidgets.QMainWindow):
         self.main_window.show()
         self.close()
 
+class SimulatedSignalWorker(QObject):
+    """Generate sinyal simulasi non-ECG (pleth, CO2) di thread terpisah
+
+    Satu channel dikirim begitu siap; MainWindow tidak menunggu ppg_simulate,
+    grafik menampilkan trace datar sampai sinyal `ready(channel, data)`
+    diterima di GUI thread. ECG dibuat streaming oleh BeatStream.
+    """
+    ready = pyqtSignal(str, object)
+    finished = pyqtSignal()
+
+    def start(self):
+        Thread(target=self.run, name='signal-sim', daemon=True).start()
+
+    def run(self):
+        duration = 60  
+        heart_rate = 72  # Heart Rate (bpm)
+        seed = 42
+        
+        # Parameter = kunci cache; versi neurokit2 ikut agar cache diperbarui saat upgrade
+        try:
+            pleth_rate = WAVEFORM_CHANNELS['pleth']['rate']
+            params = {'duration': duration, 'sampling_rate': pleth_rate, 'heart_rate': heart_rate,
+                      'seed': seed, 'neurokit2': nk.__version__}
+            self.ready.emit('pleth', cached_signal(SIM_CACHE_DIR, 'pleth', params, lambda: nk.ppg_simulate(
+                duration=duration, sampling_rate=pleth_rate, heart_rate=heart_rate, random_state=seed)))
+            # Capnogram sintetis murah (numpy saja), tidak perlu cache
+            self.ready.emit('co2', simulate_capnogram(duration, WAVEFORM_CHANNELS['co2']['rate']))
+        except Exception as e:
+            print(f"Gagal membuat sinyal simulasi: {e}")
+        self.finished.emit()
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super(MainWindow, self).__init__()
+        # Waktu mulai konstruksi, untuk time-to-interactive (probe 'startup')
+        self.created_time = time.perf_counter()
         uic.loadUi('alldata.ui', self)
         self.showMaximized()
 
-        # Inisialisasi MQTT Client
-        self.mqtt_client = MQTTClient()
-        self.mqtt_client.data_received.connect(self.update_from_mqtt)
-        self.mqtt_client.start()
-
-        self.table_trend = TableTrendWidget()
+        # Semua source data (lihat data_sources.DATA_SOURCES) di satu dispatch thread
+        self.ward = WardMonitor()
+        self.dispatcher = DataDispatcher(create_sources())
+        self.dispatcher.bed_handler = self.ward.post
+        self.dispatcher.channel_rates = {name: spec['rate'] for name, spec in WAVEFORM_CHANNELS.items()}
+        self.dispatcher.waveform_received.connect(self.update_waveform_from_source)
+        self.dispatcher.alarm_received.connect(self.update_device_alarm)
+        self.device_alarms = {}
+        self.last_source_data = {}
+        self.stats_shortcut = QShortcut(QKeySequence("Ctrl+I"), self)
+        self.stats_shortcut.activated.connect(self.show_ingest_stats)
+        self.dispatcher.start()
+
+        # Durasi callback dan jitter setiap timer, paint time grafik
+        self.perf = Instrumentation()
 
         # Real-time date and time display
         self.datetime_timer = QTimer()
-        self.datetime_timer.timeout.connect(self.update_datetime)
+        self.datetime_timer.timeout.connect(self.perf.wrap('datetime', self.update_datetime, 1000))
         self.datetime_timer.start(1000)
 
-        # Sensor data simulation
+        # Update vital signs pada display rate tetap (data source diambil dari mailbox)
         self.sensor_timer = QTimer()
-        self.sensor_timer.timeout.connect(self.update_sensor_values)
-        self.sensor_timer.start(1000)
+        self.sensor_timer.timeout.connect(
+            self.perf.wrap('sensor', self.update_sensor_values, DISPLAY_INTERVAL_MS))
+        self.sensor_timer.timeout.connect(self.perf.wrap('ward', self.update_ward, DISPLAY_INTERVAL_MS))
+        self.sensor_timer.start(DISPLAY_INTERVAL_MS)
 
         # Connect menu buttons
         self.alarmButton.clicked.connect(self.show_alarm_window)
@@ -189,47 +518,96 @@ class MainWindow(QMainWindow):
         self.patientButton.clicked.connect(self.show_patient_window)
         self.nibpButton.clicked.connect(self.toggle_nibp)
         self.table_trend = TableTrendWidget()
+        self.table_trend.timer.timeout.disconnect()
+        self.table_trend.timer.timeout.connect(
+            self.perf.wrap('table_trend', self.table_trend.update_table, self.table_trend.timer.interval()))
         self.pushButton.clicked.connect(self.show_table_trend)
 
+        # Tombol central station (semua bed)
+        self.station_window = None
+        self.stationButton = QPushButton("Central Station")
+        self.stationButton.setFont(self.pushButton.font())
+        self.horizontalLayout_2.insertWidget(
+            self.horizontalLayout_2.indexOf(self.exitButton), self.stationButton)
+        self.stationButton.clicked.connect(self.show_central_station)
+
+        # Tombol trend grafik (vital_signs terhadap waktu)
+        self.trend_graph = None
+        self.trendGraphButton = QPushButton("Trend Graph")
+        self.trendGraphButton.setFont(self.pushButton.font())
+        self.horizontalLayout_2.insertWidget(
+            self.horizontalLayout_2.indexOf(self.pushButton) + 1, self.trendGraphButton)
+        self.trendGraphButton.clicked.connect(self.show_trend_graph)
+
         # Initialize NIBP status
         self.nibp_running = False
         self.last_nibp_value = "--/--"
 
-        # Initialize for ECG Chart
-        self.data_points = 500
-        self.charts_data = {
-            'ecg1': [0] * self.data_points,
-            'ecg2': [0] * self.data_points,
-            'ecg3': [0] * self.data_points,
-        }
-        self.time_data = np.linspace(-2, 0, self.data_points)  # 2 sec
+        # Registry channel waveform (lihat WAVEFORM_CHANNELS): sampling rate, ring buffer,
+        # sumbu waktu dan skala per channel, tanpa alokasi per frame
+        self.sampling_rate = ECG_SAMPLING_RATE
+        self.channels = {}
+        for name, spec in WAVEFORM_CHANNELS.items():
+            self.channels[name] = WaveformChannel(
+                name, spec['rate'], spec.get('window', CHART_WINDOW_SECONDS),
+                scale=spec.get('scale', 1.0),
+                simulator=lambda count, name=name: self.generate_signal(name, count))
+        self.sweep_speed = None  # mm/s, None = window diatur manual
+        # HR/RR dari waveform (device atau simulasi), bukan angka acak
+        self.qrs_detector = QRSDetector(self.channels[QRS_CHANNEL].sampling_rate)
+        self.beat_count = 0
 
         # Setup grafik dengan PyQtGraph
         self.setup_all_charts()
-        self.setup_ecg_signals() 
+        self.setup_simulated_signals()
         
+        # Timer ingest waveform (simulasi, QRS) selalu jalan; timer grafik hanya menggambar
+        self.waveform_timer = QTimer()
+        self.waveform_timer.timeout.connect(self.perf.wrap('waveform', self.ingest_waveforms))
+        self.last_frame_time = None
+        self.waveform_timer.start(CHART_INTERVAL_MS)
+
         # Timer untuk update grafik
         self.chart_timer = QTimer()
-        self.chart_timer.timeout.connect(self.update_all_charts)
-        self.chart_timer.start(33)  # Update setiap 33ms
-
-    def setup_chart(self, widget, title, y_range=(-1.0, 1.5)):
-        # Create a PlotWidget
-        plot_widget = PlotWidget()
-        
-        # Customize the appearance
-        plot_widget.setBackground('black')
-        plot_widget.setTitle(title, color='white', size='10pt')
-        plot_widget.setYRange(*y_range)
-        plot_widget.showGrid(x=True, y=True, alpha=0.3)
+        self.chart_timer.timeout.connect(self.perf.wrap('chart', self.update_all_charts, CHART_INTERVAL_MS))
+        self.chart_timer.start(CHART_INTERVAL_MS)
+
+        # Paint time grafik dan overlay instrumentasi
+        for index, widget in enumerate(self.chart_widgets):
+            self.perf.watch_paint(f'paint_chart{index + 1}', widget)
+        self.perf_overlay = QLabel(self)
+        self.perf_overlay.setStyleSheet(
+            "color: white; background-color: rgba(0, 0, 0, 180); font-family: monospace; padding: 4px;")
+        self.perf_overlay.hide()
+        self.perf_timer = QTimer()
+        self.perf_timer.timeout.connect(self.update_perf_overlay)
+        self.perf_shortcut = QShortcut(QKeySequence("Ctrl+P"), self)
+        self.perf_shortcut.activated.connect(self.toggle_perf_overlay)
+        self.perf_dump_shortcut = QShortcut(QKeySequence("Ctrl+Shift+P"), self)
+        self.perf_dump_shortcut.activated.connect(self.dump_perf_stats)
+        if PERF_OVERLAY:
+            self.toggle_perf_overlay()
+
+        # Rendering hanya saat window terlihat; ingestion, penyimpanan dan alarm tetap jalan.
+        # Dicek juga tiap tick sensor untuk window yang tertutup window lain (tidak exposed)
+        self.display_active = True
+        self.sensor_timer.timeout.connect(self.apply_visibility_policy)
+        self.apply_visibility_policy()
+
+        # Event loop pertama kali idle = window sudah tampil dan bisa dipakai
+        QTimer.singleShot(0, self.mark_interactive)
+
+    def style_plot(self, plot_item, title, y_range, x_label=True, y_label='Amplitude'):
+        """Tampilan plot (judul, grid, warna axis) untuk satu lead"""
+        plot_item.setTitle(title, color='white', size='10pt')
+        plot_item.setYRange(*y_range)
+        plot_item.showGrid(x=True, y=True, alpha=0.3)
         
         # Customize axis colors
         styles = {'color': 'white', 'font-size': '8pt'}
-        plot_widget.setLabel('left', 'Amplitude', **styles)
-        plot_widget.setLabel('bottom', 'Time', **styles)
-        
-        # Get the plot item to customize axes
-        plot_item = plot_widget.getPlotItem()
+        plot_item.setLabel('left', y_label, **styles)
+        if x_label:
+            plot_item.setLabel('bottom', 'Time', **styles)
         
         # Customize axis pens
         axis_pen = pg.mkPen(color='white', width=1)
@@ -239,65 +617,282 @@ class MainWindow(QMainWindow):
         # Customize axis text
         plot_item.getAxis('left').setTextPen(axis_pen)
         plot_item.getAxis('bottom').setTextPen(axis_pen)
-        
-        # Plot initial data
-        line = plot_widget.plot(self.time_data, [0] * self.data_points, pen='cyan')
+
+    def setup_trace(self, signal_type, plot_item):
+        """Buat kurva channel sesuai CHART_MODE"""
+        channel = self.channels[signal_type]
+        pen = WAVEFORM_CHANNELS[signal_type].get('pen', 'cyan')
+        if CHART_MODE == 'sweep':
+            line = SweepTrace(plot_item, len(channel.time_axis), channel.sampling_rate, pen=pen)
+        else:
+            line = plot_item.plot(channel.time_axis, np.zeros(len(channel.time_axis)), pen=pen)
+        self.set_x_range(signal_type, plot_item)
+        self.setup_chart_menu(signal_type, plot_item)
+        return line
+
+    def set_x_range(self, signal_type, plot_item):
+        # Sumbu x tetap, auto range tidak perlu menghitung ulang axis tiap frame
+        channel = self.channels[signal_type]
+        if CHART_MODE == 'sweep':
+            plot_item.setXRange(0, channel.window, padding=0)
+        else:
+            plot_item.setXRange(channel.time_axis[0], 0, padding=0)
+
+    def setup_chart_menu(self, signal_type, plot_item):
+        """Submenu window dan sweep speed di menu klik kanan plot"""
+        menu = plot_item.vb.menu
+        window_menu = menu.addMenu("Window")
+        for seconds in CHART_WINDOW_CHOICES:
+            action = window_menu.addAction(f"{seconds} s")
+            action.triggered.connect(
+                lambda checked, s=seconds: self.set_chart_window(signal_type, s, manual=True))
+        speed_menu = menu.addMenu("Sweep speed")
+        for speed in CHART_SWEEP_SPEEDS:
+            action = speed_menu.addAction(f"{speed:g} mm/s")
+            action.triggered.connect(lambda checked, v=speed: self.set_sweep_speed(v))
+
+    def chart_group(self, signal_type):
+        """Channel dengan sumbu x bersama pada layout 'single' (mis. semua lead ECG)"""
+        return WAVEFORM_CHANNELS[signal_type].get('group', signal_type)
+
+    def set_chart_window(self, signal_type, seconds, manual=False):
+        """Ubah panjang window satu channel (satu grup pada layout 'single', sumbu x bersama)
+
+        Buffer, sumbu waktu dan buffer decimasi dialokasi ulang sekali di sini, history terbaru
+        dipertahankan; loop render per frame tetap tanpa alokasi.
+        """
+        if manual:
+            self.sweep_speed = None
+        seconds = min(max(seconds, CHART_WINDOW_MIN), CHART_WINDOW_MAX)
+        if CHART_LAYOUT == 'single':
+            group = self.chart_group(signal_type)
+            signal_types = [name for name in self.lines if self.chart_group(name) == group]
+        else:
+            signal_types = [signal_type]
+        for signal_type in signal_types:
+            channel = self.channels[signal_type]
+            if channel.window == seconds:
+                continue
+            channel.set_window(seconds)
+            if CHART_MODE == 'sweep':
+                self.lines[signal_type].resize(channel.buffer.capacity, channel.history())
+            self.set_x_range(signal_type, self.plot_items[signal_type])
+
+    def set_sweep_speed(self, mm_per_s):
+        """Sweep speed (mm/s): window tiap channel = lebar fisik plot / kecepatan"""
+        self.sweep_speed = mm_per_s
+        for signal_type, plot_item in self.plot_items.items():
+            width_mm = plot_item.vb.width() / max(self.physicalDpiX(), 1) * 25.4
+            if width_mm > 0:
+                # Dibulatkan 0.1 s agar resize kecil tidak mengalokasi ulang buffer
+                self.set_chart_window(signal_type, round(width_mm / mm_per_s, 1))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # Sweep speed tetap sama saat lebar plot berubah
+        if getattr(self, 'sweep_speed', None):
+            self.set_sweep_speed(self.sweep_speed)
+
+    def setup_chart(self, signal_type, widget):
+        # Create a PlotWidget
+        spec = WAVEFORM_CHANNELS[signal_type]
+        plot_widget = PlotWidget()
+        plot_widget.setBackground('black')
+        plot_item = plot_widget.getPlotItem()
+        self.style_plot(plot_item, spec['title'], spec['y_range'], y_label=spec.get('unit', 'Amplitude'))
+        line = self.setup_trace(signal_type, plot_item)
+        self.chart_widgets.append(plot_widget)
         
         # Add to widget
         layout = QVBoxLayout()
         layout.addWidget(plot_widget)
         widget.setLayout(layout)
         
-        return line, plot_widget
+        return line, plot_item
+
+    def chart_frame(self, signal_type):
+        """Frame grafik di grid: frame ECG dari alldata.ui, channel lain dibuat dengan gaya yang sama"""
+        frame = getattr(self, signal_type, None)
+        if frame is not None:
+            return frame
+        outer = QFrame()
+        outer.setFrameShape(QFrame.StyledPanel)
+        outer.setFrameShadow(QFrame.Raised)
+        layout = QHBoxLayout(outer)
+        layout.setContentsMargins(0, 0, 0, 0)
+        label = QLabel(WAVEFORM_CHANNELS[signal_type]['label'])
+        label.setFont(self.label_20.font())
+        label.setStyleSheet(self.label_20.styleSheet())
+        label.setAlignment(Qt.AlignCenter)
+        frame = QFrame()
+        frame.setFrameShape(QFrame.StyledPanel)
+        frame.setFrameShadow(QFrame.Raised)
+        layout.addWidget(label, 1)
+        layout.addWidget(frame, 9)
+        self.gridLayout.addWidget(outer, self.gridLayout.rowCount(), 0)
+        setattr(self, signal_type, frame)
+        return frame
 
     def setup_all_charts(self):
-        # Dictionary untuk menyimpan line dan widget setiap grafik
+        # Dictionary untuk menyimpan line dan plot item setiap grafik
         self.lines = {}
-        self.plot_widgets = {}
+        self.plot_items = {}
+        self.chart_widgets = []
+        self.chart_budget = FrameBudget(CHART_FRAME_BUDGET_MS)
+        if CHART_LAYOUT == 'single':
+            self.setup_single_chart()
+            return
         
         # Setup setiap grafik
-        self.lines['ecg1'], self.plot_widgets['ecg1'] = self.setup_chart(
-            self.ecg1, "ECG Lead I", (-1.5, 1.5))
-        self.lines['ecg2'], self.plot_widgets['ecg2'] = self.setup_chart(
-            self.ecg2, "ECG Lead II", (-1.5, 1.5))
-        self.lines['ecg3'], self.plot_widgets['ecg3'] = self.setup_chart(
-            self.ecg3, "ECG Lead III", (-1.5, 1.5))
-
-    def setup_ecg_signals(self):
-        """Initialize parameter ECG signals"""
-        duration = 60  
-        sampling_rate = 250  # Sampling frequency(Hz)
-        heart_rate = 72  # Heart Rate (bpm)
-        
-        self.ecg_data = {
-            'ecg1': nk.ecg_simulate(duration, sampling_rate, heart_rate, method="ecgsyn", noise=0.03, random_state=np.random.RandomState(42)),
-            'ecg2': nk.ecg_simulate(duration, sampling_rate, heart_rate, method="ecgsyn", noise=0.01, random_state=np.random.RandomState(42)),
-            'ecg3': nk.ecg_simulate(duration, sampling_rate, heart_rate, method="ecgsyn", noise=0.02, random_state=np.random.RandomState(42))
-        }
-        self.ecg_pointers = {key: 0 for key in self.ecg_data.keys()}
-        self.ecg_length = len(self.ecg_data['ecg1'])
-
-    def generate_signal(self, signal_type):
-        """Generate realistic ECG signal using neurokit2"""
-        if signal_type in self.ecg_data:
-            # Get current position in ECG data
-            idx = self.ecg_pointers[signal_type]
-            
-            # Get the value and move pointer
-            value = self.ecg_data[signal_type][idx]
-            self.ecg_pointers[signal_type] = (idx + 1) % self.ecg_length
-            
-            return value
-        return 0
+        for signal_type in self.channels:
+            self.lines[signal_type], self.plot_items[signal_type] = self.setup_chart(
+                signal_type, self.chart_frame(signal_type))
+
+    def setup_single_chart(self):
+        """Semua channel dalam satu GraphicsLayoutWidget: satu scene, sumbu x bersama per grup"""
+        self.chart_view = pg.GraphicsLayoutWidget()
+        self.chart_view.setBackground('black')
+        self.chart_widgets.append(self.chart_view)
+        if CHART_OPENGL:
+            try:
+                self.chart_view.useOpenGL(True)
+            except Exception as e:
+                print(f"OpenGL tidak tersedia, memakai raster: {e}")
+
+        signal_types = list(self.channels)
+        group_first = {}
+        for row, signal_type in enumerate(signal_types):
+            spec = WAVEFORM_CHANNELS[signal_type]
+            group = self.chart_group(signal_type)
+            plot_item = self.chart_view.addPlot(row=row, col=0)
+            # Axis waktu hanya di plot terakhir tiap grup
+            last = row == len(signal_types) - 1 or self.chart_group(signal_types[row + 1]) != group
+            self.style_plot(plot_item, spec['title'], spec['y_range'], x_label=last,
+                            y_label=spec.get('unit', 'Amplitude'))
+            if group in group_first:
+                plot_item.setXLink(group_first[group])
+            else:
+                group_first[group] = plot_item
+            if not last:
+                plot_item.hideAxis('bottom')
+            self.lines[signal_type] = self.setup_trace(signal_type, plot_item)
+            self.plot_items[signal_type] = plot_item
+
+        # Ganti frame grafik di grid dengan satu widget yang membentang semua baris
+        for frame in (self.frame_9, self.frame_11, self.frame_13):
+            self.gridLayout.removeWidget(frame)
+            frame.hide()
+        self.gridLayout.addWidget(self.chart_view, 0, 0, len(signal_types), 1)
+
+    def setup_simulated_signals(self):
+        """Sinyal simulasi per channel (fallback saat device tidak mengirim waveform)
+
+        ECG langsung tersedia (BeatStream, tanpa prekomputasi). Pleth dan CO2
+        dibuat di background (SimulatedSignalWorker); sampai siap, channel
+        menampilkan trace datar dengan judul "initializing".
+        """
+        self.sim_data = {}
+        self.sim_pointers = {}
+        for signal_type, plot_item in self.plot_items.items():
+            if 'lead' in WAVEFORM_CHANNELS[signal_type]:
+                continue
+            plot_item.setTitle(f"{WAVEFORM_CHANNELS[signal_type]['title']} (initializing...)",
+                               color='gray', size='10pt')
+        # ECG: streaming dari template beat, mengikuti HR yang ditampilkan (update_sensor_values)
+        self.ecg_stream = BeatStream(
+            self.sampling_rate, [spec['lead'] for spec in WAVEFORM_CHANNELS.values() if 'lead' in spec],
+            heart_rate=72, scenario=Scenario.parse(SIM_SCENARIO) if SIM_SCENARIO else None)
+        self.sim_heart_rate = 72
+        self.sim_worker = SimulatedSignalWorker()
+        self.sim_worker.ready.connect(self.simulated_signal_ready)
+        self.sim_worker.finished.connect(self.simulated_signals_finished)
+        self.sim_worker.start()
+
+    def simulated_signal_ready(self, signal_type, data):
+        self.sim_data[signal_type] = data
+        self.sim_pointers[signal_type] = 0
+        if signal_type in self.plot_items:
+            self.plot_items[signal_type].setTitle(
+                WAVEFORM_CHANNELS[signal_type]['title'], color='white', size='10pt')
+
+    def simulated_signals_finished(self):
+        # Waktu dari konstruksi sampai semua sinyal simulasi siap
+        self.perf.probe('sim_ready').record(self.created_time, time.perf_counter() - self.created_time)
+
+    def mark_interactive(self):
+        self.perf.probe('startup').record(self.created_time, time.perf_counter() - self.created_time)
+
+    def generate_signal(self, signal_type, count):
+        """Ambil `count` sampel berikutnya dari sinyal simulasi channel (slice, tanpa loop)"""
+        lead = WAVEFORM_CHANNELS.get(signal_type, {}).get('lead')
+        if lead is not None:
+            return self.ecg_stream.read(lead, count)
+        if signal_type not in self.sim_data:
+            return np.zeros(count)
+        data = self.sim_data[signal_type]
+        length = len(data)
+        idx = self.sim_pointers[signal_type]
+        end = idx + count
+        self.sim_pointers[signal_type] = end % length
+        if end <= length:
+            return data[idx:end]
+        # Melewati akhir data simulasi, sambung dari awal
+        return np.take(data, np.arange(idx, end), mode='wrap')
+
+    def frame_elapsed(self, now):
+        """Detik sejak ingest terakhir; jumlah sampel dihitung per channel dari sini"""
+        if self.last_frame_time is None:
+            self.last_frame_time = now
+            return 0.0
+        # Batasi ke satu window terpanjang jika GUI sempat tertahan lama
+        elapsed = min(now - self.last_frame_time, CHART_WINDOW_MAX)
+        self.last_frame_time = now
+        return elapsed
         
+    def append_samples(self, signal_type, samples):
+        """Tambahkan blok sampel baru ke ring buffer channel sekaligus"""
+        self.channels[signal_type].buffer.append(samples)
+        if CHART_MODE == 'sweep':
+            self.lines[signal_type].write(samples)
+        if signal_type == QRS_CHANNEL:
+            self.beat_count += len(self.qrs_detector.process(samples))
+
+    def update_waveform_from_source(self, leads):
+        """Terima blok waveform multi-channel dari source (MQTT, serial, replay)"""
+        now = time.monotonic()
+        for signal_type, samples in leads.items():
+            channel = self.channels.get(signal_type)
+            if channel is not None:
+                self.append_samples(signal_type, channel.scaled(samples))
+                channel.device_time = now
+
+    def ingest_waveforms(self):
+        """Satu pass untuk semua channel, jumlah sampel sesuai sampling rate masing-masing
+
+        Tidak ikut dihentikan visibility policy: buffer, detektor QRS dan
+        alarm HR tetap berjalan saat window tersembunyi.
+        """
+        now = time.monotonic()
+        elapsed = self.frame_elapsed(now)
+        for signal_type, channel in self.channels.items():
+            count = channel.samples_due(elapsed)
+            # Pakai simulasi hanya jika device tidak mengirim waveform channel ini
+            if count and (channel.device_time is None or now - channel.device_time > 1.0):
+                self.append_samples(signal_type, channel.simulator(count))
+
     def update_all_charts(self):
-        # Update data dan grafik
+        # Hanya menggambar; sampel masuk lewat ingest_waveforms / update_waveform_from_source
+        self.chart_budget.start()
         for signal_type, line in self.lines.items():
-            new_value = self.generate_signal(signal_type)
-            self.charts_data[signal_type] = self.charts_data[signal_type][1:] + [new_value]
-            
+            channel = self.channels[signal_type]
             # Update data grafik
-            line.setData(self.time_data, self.charts_data[signal_type])
+            if CHART_MODE == 'sweep':
+                line.render()
+            else:
+                # Decimasi min/max sesuai lebar plot (pixel), biaya paint tidak tergantung panjang window
+                width = self.plot_items[signal_type].vb.width()
+                line.setData(*channel.decimator(channel.time_axis, channel.buffer.view(), width))
+        self.chart_budget.stop()
 
     def update_datetime(self):
         current_time = QTime.currentTime()
@@ -324,13 +919,35 @@ class MainWindow(QMainWindow):
             }
 
     def update_sensor_values(self):
-        # Update nilai sensor seperti biasa
-        ecg = random.randint(60, 100)
-        self.ecgInput.setText(str(ecg))
+        # Ambil snapshot terbaru, pesan di antaranya sudah digabung di mailbox
+        snapshot = self.dispatcher.mailbox.take()
+        if snapshot is not None:
+            self.update_from_source(snapshot)
+        data = self.last_source_data
+
+        # Update nilai sensor, pakai data source jika ada
+        # HR dari detektor QRS; sebelum beat pertama terdeteksi pakai HR device/target simulasi.
+        # Target simulasi: HR device jika ada, selain itu berubah pelan dalam 60-100
+        if 'hr' in data:
+            self.sim_heart_rate = data['hr']
+        else:
+            self.sim_heart_rate = min(max(self.sim_heart_rate + random.randint(-2, 2), 60), 100)
+        self.ecg_stream.heart_rate = self.sim_heart_rate
+        # Lead off: HR tidak valid, tampil "--" dan alarm HR dilewati
+        if self.qrs_detector.lead_off:
+            ecg = None
+        else:
+            detected = self.qrs_detector.heart_rate
+            ecg = round(detected if detected is not None else self.sim_heart_rate)
+        self.ecgInput.setText("--" if ecg is None else str(ecg))
 
-        # NIBP (Systolic/Diastolic)
+        # NIBP (Systolic/Diastolic), dari source jika dikirim (mis. NIBP lewat MQTT)
         sys, dias = 120, 80  # Default
-        if self.nibp_running:
+        if 'sys' in data:
+            sys, dias = data['sys'], data['dias']
+            self.last_nibp_value = f"{sys}/{dias}"
+            self.nibpInput.setText(self.last_nibp_value)
+        elif self.nibp_running:
             sys = random.randint(80, 120)
             dias = random.randint(60, 90)
             self.last_nibp_value = f"{sys}/{dias}"
@@ -339,16 +956,16 @@ class MainWindow(QMainWindow):
             self.nibpInput.setText(self.last_nibp_value)
 
         # Parameter lainnya
-        spo2 = random.randint(90, 100)
+        spo2 = round(data['spo2']) if 'spo2' in data else random.randint(90, 100)
         self.spo2Input.setText(str(spo2))
 
-        resp = random.randint(5, 25)
+        resp = round(data['resp']) if 'resp' in data else random.randint(5, 25)
         self.respInput.setText(str(resp))
 
-        temp = round(random.uniform(36.0, 38.0), 1)
+        temp = round(data['temp'] if 'temp' in data else random.uniform(36.0, 38.0), 1)
         self.tempInput.setText(f"{temp}")
 
-        co2 = random.randint(30, 45)
+        co2 = round(data['etco2']) if 'etco2' in data else random.randint(30, 45)
         self.co2Input.setText(str(co2))
         
         # Save values to trend table
@@ -370,76 +987,22 @@ class MainWindow(QMainWindow):
             self.alert2.setStyleSheet("background-color: rgb(0, 170, 255); border: 0px")
             return
         # Check warning/critical conditions
-        alert_text = []
-        critical_alerts = []
-
-        # Heart Rate
-        if 0 <= ecg < 40:
-            critical_alerts.append("CRITICAL: Heart Rate <40 bpm!")
-        elif 40 <= ecg < self.alarm_values['HRlow']:
-            alert_text.append(f"Heart Rate Low! ({ecg} bpm)")
-        elif self.alarm_values['HRhigh'] < ecg <= 140:
-            alert_text.append(f"Heart Rate High! ({ecg} bpm)")
-        elif ecg > 140:
-            critical_alerts.append("CRITICAL: Heart Rate >140 bpm!")
-
-        # SpO2
-        if 0 <= spo2 <= 90:
-            critical_alerts.append("CRITICAL: SpO₂ ≤90%!")
-        elif 90 < spo2 < self.alarm_values['spO2low']:
-            alert_text.append(f"Warning: SpO₂ Low ({spo2}%)")
-        elif spo2 >= self.alarm_values['spO2high']:
-            alert_text.append(f"SpO₂ High ({spo2}%)")
-
-        # NIBP - Systolic
-        if 0 <= sys < 70:
-            critical_alerts.append("CRITICAL: Systolic BP <70 mmHg!")
-        elif 70 <= sys < self.alarm_values['sysLow']:
-            alert_text.append(f"Warning: Systolic BP Low {sys}mmHg)")
-        elif self.alarm_values['sysHigh'] < sys < 180:
-            alert_text.append(f"Warning: Systolic BP High {sys}mmHg)")
-        elif sys >= 180:
-            critical_alerts.append("CRITICAL: Systolic BP ≥180 mmHg!")
-
-        # NIBP - Diastolic
-        if 0 <= dias < 40:
-            critical_alerts.append("CRITICAL: Diastolic BP <40 mmHg!")
-        elif 70 <= dias < self.alarm_values['diasLow']:
-            alert_text.append(f"Warning: Diastolic BP Low {dias} mmHg)")
-        elif self.alarm_values['diasHigh'] < dias < 110:
-            alert_text.append(f"Warning: Diastolic BP High {dias} mmHg)")
-        elif dias >= 110:
-            critical_alerts.append("CRITICAL: Diastolic BP ≥110 mmHg!")
-
-        # Temperature
-        if 0 <= temp < 35.0:
-            critical_alerts.append("CRITICAL: Temperature <35°C!")
-        elif 35.0 <= temp < self.alarm_values['tempLow']:
-            alert_text.append(f"Warning: Temperature Low {temp}°C)")
-        elif self.alarm_values['tempHigh'] < temp < 40:
-            alert_text.append(f"Warning: Temperature High {temp}°C")
-        elif temp >= 40:
-            critical_alerts.append("CRITICAL: Temperature >40°C!")
-
-        # ETCO2
-        if 0 <= co2 <= 30:
-            critical_alerts.append("CRITICAL: ETCO₂ <30 mmHg!")
-        elif 30 < co2 < self.alarm_values['etco2low']:
-            alert_text.append(f"Warning: ETCO₂ Low {co2} mmHg")
-        elif self.alarm_values['etco2High'] < co2 <= 50:
-            alert_text.append(f"Warning: ETCO₂ High {co2} mmHg")
-        elif co2 > 50:
-            critical_alerts.append("CRITICAL: ETCO₂ >50 mmHg!")
-
-        # Respiratory Rate
-        if resp < 6:
-            critical_alerts.append("CRITICAL: Respiratory Rate <6/min!")
-        elif 6 <= resp < self.alarm_values['respLow']:
-            alert_text.append(f"Respiratory Rate Low {resp}/min")
-        elif self.alarm_values['respHigh'] < resp <= 30:
-            alert_text.append(f"Respiratory Rate High {resp}/min")
-        elif resp > 30:
-            critical_alerts.append("CRITICAL: Respiratory Rate >30/min!")
+        critical_alerts, alert_text = evaluate_alarms(
+            self.alarm_values, ecg=ecg, spo2=spo2, sys=sys, dias=dias,
+            temp=temp, co2=co2, resp=resp
+        )
+        if self.qrs_detector.lead_off:
+            alert_text.append("ECG Lead Off")
+
+        # Alarm dari device yang masih aktif
+        now = time.monotonic()
+        for message, (level, expiry) in list(self.device_alarms.items()):
+            if now > expiry:
+                del self.device_alarms[message]
+            elif level == 'critical':
+                critical_alerts.append(message)
+            else:
+                alert_text.append(message)
 
         # Update UI based on alerts
         if critical_alerts:
@@ -482,26 +1045,115 @@ class MainWindow(QMainWindow):
 
  
 
-    def update_from_mqtt(self, data):
-        """Update from MQTT and store the pure data without fallback"""
+    def update_from_source(self, data):
+        """Gabungkan snapshot source terbaru, dipanggil dari update_sensor_values
+
+        Hanya key yang dikirim yang diganti, sehingga beberapa source bisa
+        mengisi parameter berbeda (mis. HR dari serial, NIBP dari MQTT).
+        """
         try:
-            # Store the pure MQTT data
-            self.last_mqtt_data = {
-                'hr': float(data.get('hr', 0)),
-                'spo2': float(data.get('spo2', 0)),
-                'temp': float(data.get('temp', 0.0)),
-                'etco2': float(data.get('etco2', 0))
-            }
-            
-            # Trigger an immediate update
-            self.update_sensor_values()
-            
+            values = {}
+            for key in ('hr', 'spo2', 'temp', 'etco2', 'resp'):
+                if key in data:
+                    values[key] = float(data[key])
+            if 'nibp' in data and '/' in str(data['nibp']):
+                sys, dias = str(data['nibp']).split('/', 1)
+                values['sys'], values['dias'] = int(sys), int(dias)
+            self.last_source_data.update(values)
         except Exception as e:
-            print(f"Error updating from MQTT: {e}")
-            # If error occurs, remove the last_mqtt_data
-            if hasattr(self, 'last_mqtt_data'):
-                del self.last_mqtt_data
-
+            print(f"Error updating from source: {e}")
+
+
+    def update_device_alarm(self, data):
+        """Simpan alarm dari device, ditampilkan selama DEVICE_ALARM_HOLD detik"""
+        message = str(data.get('message', 'Device alarm'))
+        level = data.get('level', 'warning')
+        self.device_alarms[message] = (level, time.monotonic() + DEVICE_ALARM_HOLD)
+
+    def show_ingest_stats(self):
+        """Tampilkan counter ingestion (Ctrl+I)"""
+        lines = []
+        stats = self.dispatcher.stats()
+        stats['chart_frame'] = self.chart_budget.stats()
+        rr = self.qrs_detector.rr_interval
+        stats['qrs'] = {'hr': self.qrs_detector.heart_rate and round(self.qrs_detector.heart_rate, 1),
+                        'rr_ms': rr and round(rr * 1000), 'beats': self.beat_count}
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                value = ", ".join(f"{k}={v}" for k, v in value.items())
+            lines.append(f"{key}: {value}")
+        QMessageBox.information(self, "Ingestion Stats", "\n".join(lines))
+
+    def is_displayed(self):
+        if not self.isVisible() or self.isMinimized():
+            return False
+        handle = self.windowHandle()
+        return handle is None or handle.isExposed()
+
+    def apply_visibility_policy(self):
+        """Hentikan timer tampilan (grafik, jam, overlay) saat window tidak terlihat"""
+        displayed = self.is_displayed()
+        if displayed == self.display_active:
+            return
+        self.display_active = displayed
+        if displayed:
+            self.update_datetime()
+            self.datetime_timer.start(1000)
+            self.chart_timer.start(CHART_INTERVAL_MS)
+            self.waveform_timer.setInterval(CHART_INTERVAL_MS)
+            if self.perf_overlay.isVisible():
+                self.perf_timer.start(1000)
+        else:
+            self.chart_timer.stop()
+            self.datetime_timer.stop()
+            self.perf_timer.stop()
+            # Ingest tetap jalan, cukup lebih jarang
+            self.waveform_timer.setInterval(WAVEFORM_HIDDEN_INTERVAL_MS)
+            self.perf.pause('chart', 'datetime')
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if hasattr(self, 'display_active'):
+            self.apply_visibility_policy()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        if hasattr(self, 'display_active'):
+            self.apply_visibility_policy()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange and hasattr(self, 'display_active'):
+            self.apply_visibility_policy()
+
+    def toggle_perf_overlay(self):
+        """Tampilkan/sembunyikan overlay instrumentasi (Ctrl+P)"""
+        if self.perf_overlay.isVisible():
+            self.perf_overlay.hide()
+            self.perf_timer.stop()
+        else:
+            self.update_perf_overlay()
+            self.perf_overlay.show()
+            self.perf_overlay.raise_()
+            self.perf_timer.start(1000)
+
+    def update_perf_overlay(self):
+        budget = self.chart_budget.stats()
+        self.perf_overlay.setText(
+            self.perf.report() +
+            f"\nchart budget {budget['budget_ms']} ms: p99 {budget['p99_ms']} ms, overruns {budget['overruns']}")
+        self.perf_overlay.adjustSize()
+        self.perf_overlay.move(10, self.header.height() + 10)
+
+    def dump_perf_stats(self, path=None):
+        """Tulis statistik instrumentasi ke file JSON (Ctrl+Shift+P)"""
+        path = path or PERF_FILE or 'perf_stats.json'
+        try:
+            self.perf.dump(path, {'chart_budget': self.chart_budget.stats(),
+                                  'ingest': self.dispatcher.stats()})
+            print(f"Statistik performa disimpan ke {path}")
+        except OSError as e:
+            print(f"Gagal menyimpan statistik performa: {e}")
 
     def verify_password(self):
         """Verifikasi password sebelum membuka window tertentu"""
@@ -542,15 +1194,44 @@ class MainWindow(QMainWindow):
     def show_table_trend(self):
         self.table_trend.show()
 
+    def show_trend_graph(self):
+        if self.trend_graph is None:
+            self.trend_graph = TrendGraphWidget()
+        self.trend_graph.show()
+
+    def show_central_station(self):
+        if self.station_window is None:
+            self.station_window = CentralStationWindow(self.ward)
+        # Sinkronkan semua bed, selama window tertutup hanya data yang diproses
+        self.station_window.update_beds(self.ward.all_beds())
+        self.station_window.show()
+
+    def update_ward(self):
+        """Proses data semua bed, tetap berjalan walau window station ditutup"""
+        if not hasattr(self, 'alarm_values'):
+            self.load_alarm_values()
+        updated = self.ward.process(self.alarm_values)
+        if updated and self.station_window is not None and self.station_window.isVisible():
+            self.station_window.update_beds(updated)
+
     def exit_to_login(self):
         # Stop semua timer yang aktif
         self.sensor_timer.stop()
         self.datetime_timer.stop()
         self.chart_timer.stop()
+        self.waveform_timer.stop()
+        self.perf_timer.stop()
+        if PERF_FILE:
+            self.dump_perf_stats()
         
-        # Hentikan koneksi MQTT jika ada
-        if hasattr(self, 'mqtt_client'):
-            self.mqtt_client.stop()
+        # Hentikan semua source data
+        if hasattr(self, 'dispatcher'):
+            self.dispatcher.stop()
+            self.ward.close()
+        if self.station_window is not None:
+            self.station_window.close()
+        if self.trend_graph is not None:
+            self.trend_graph.close()
         
         # Reset data
         self.table_trend.clear_database()
@@ -570,11 +1251,67 @@ class MainWindow(QMainWindow):
             self.sensor_timer.stop()
             self.datetime_timer.stop()
             self.chart_timer.stop()
-            if hasattr(self, 'mqtt_client'):
-                self.mqtt_client.stop()
+            self.waveform_timer.stop()
+            if hasattr(self, 'dispatcher'):
+                self.dispatcher.stop()
         except:
             pass
 
+class CentralStationWindow(QMainWindow):
+    """Ringkasan vital signs semua bed dari topik monitoring/<bed>/parameter"""
+
+    HEADERS = ['Bed', 'HR', 'SpO2', 'NIBP', 'RESP', 'Temp', 'EtCO2', 'Status']
+    COLORS = {'critical': QColor(255, 0, 0), 'warning': QColor(255, 255, 0),
+              'normal': QColor(0, 255, 0)}
+
+    def __init__(self, ward):
+        super().__init__()
+        self.ward = ward
+        self.rows = {}
+        self.setWindowTitle("Central Station")
+        self.resize(900, 600)
+
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        header = self.table.horizontalHeader()
+        for i in range(len(self.HEADERS) - 1):
+            header.setSectionResizeMode(i, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(len(self.HEADERS) - 1, QHeaderView.Stretch)
+        self.setCentralWidget(self.table)
+
+
+    def row_for(self, bed_id):
+        row = self.rows.get(bed_id)
+        if row is None:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            for col in range(len(self.HEADERS)):
+                self.table.setItem(row, col, QTableWidgetItem(""))
+            self.table.item(row, 0).setText(bed_id)
+            self.rows[bed_id] = row
+        return row
+
+    def update_beds(self, beds):
+        """Update hanya baris bed yang menerima data baru"""
+        for bed in beds:
+            row = self.row_for(bed.bed_id)
+            v = bed.values
+            cells = (v.get('hr', '--'), v.get('spo2', '--'), bed.nibp, v.get('resp', '--'),
+                     v.get('temp', '--'), v.get('etco2', '--'), bed.status)
+            for col, value in enumerate(cells, start=1):
+                self.table.item(row, col).setText(str(value))
+
+            if bed.critical_alerts:
+                color = self.COLORS['critical']
+            elif bed.alert_text:
+                color = self.COLORS['warning']
+            else:
+                color = self.COLORS['normal']
+            self.table.item(row, len(self.HEADERS) - 1).setBackground(color)
+
+
 class AlarmWindow(QMainWindow):
     def __init__(self):
         super(AlarmWindow, self).__init__()
@@ -736,10 +1473,10 @@ class TableTrendWidget(QWidget):
         for i in range(len(headers)):
             header.setSectionResizeMode(i, QHeaderView.Stretch)
 
-        # Update tabel setiap 1 detik
+        # Update tabel setiap 1 detik, hanya selama widget terlihat (lihat showEvent)
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_table)
-        self.timer.start(1000)
+        self.timer.setInterval(1000)
 
         self.ok_button = QPushButton("OK")
         self.ok_button.clicked.connect(self.close)
@@ -765,6 +1502,11 @@ class TableTrendWidget(QWidget):
                 co2 INTEGER
             )
         ''')
+        # Query per rentang waktu (tabel, trend grafik, cek duplikat) memakai index ini
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_vital_signs_timestamp
+            ON vital_signs (timestamp)
+        ''')
         conn.commit()
         conn.close()
 
@@ -801,8 +1543,10 @@ class TableTrendWidget(QWidget):
         if self.alarm_values.get('alarm_status', 'ON') == 'OFF':
             return "Alarm OFF"
         
-        # Heart Rate conditions
-        if 0 <= ecg < 40:
+        # Heart Rate conditions (None = lead off, tidak dinilai)
+        if ecg is None:
+            pass
+        elif 0 <= ecg < 40:
             conditions.append("Critical Low HR")
         elif 40 <= ecg < self.alarm_values['HRlow']:
             conditions.append("Low HR")
@@ -898,7 +1642,7 @@ class TableTrendWidget(QWidget):
             self.table.setRowCount(len(data))
             for row, record in enumerate(data):
                 for col, value in enumerate(record):
-                    self.table.setItem(row, col, QTableWidgetItem(str(value)))
+                    self.table.setItem(row, col, QTableWidgetItem("--" if value is None else str(value)))
 
                 # Tentukan kondisi
                 condition = self.get_condition(record[1], record[2], record[3], 
@@ -995,17 +1739,18 @@ class TableTrendWidget(QWidget):
                     condition = self.get_condition(row[1], row[2], row[3], row[4], row[5], row[6])
                     writer.writerow([*row, condition])
 
-        def showEvent(self, event):
-            self.timer.start()
-            super().showEvent(event)
+    def showEvent(self, event):
+        self.update_table()
+        self.timer.start()
+        super().showEvent(event)
 
-        def hideEvent(self, event):
-            self.timer.stop()
-            super().hideEvent(event)
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
 
-        def clear_table(self):
-            """Clear all data from the trend table."""
-            self.table.setRowCount(0)
+    def clear_table(self):
+        """Clear all data from the trend table."""
+        self.table.setRowCount(0)
 
     def clear_database(self):
             print("Resetting database...")  # Debug log
@@ -1015,8 +1760,179 @@ class TableTrendWidget(QWidget):
             conn.commit()
             conn.close()
             
+class TrendGraphWidget(QWidget):
+    """Trend grafik vital signs dari tabel vital_signs
+
+    Data diambil per rentang yang terlihat dengan agregasi per bucket di SQL
+    (ukuran bucket mengikuti zoom: kira-kira satu bucket per pixel), lalu
+    langsung menjadi array NumPy; tidak pernah memuat semua baris.
+    """
+
+    PARAMETERS = [
+        ('ecg', 'HR (BPM)', 'lime'),
+        ('spo2', 'SpO2 (%)', 'y'),
+        ('nibp', 'NIBP (mmHg)', 'c'),
+        ('resp', 'RESP (/min)', 'y'),
+        ('temp', 'Temp (C)', 'w'),
+        ('co2', 'EtCO2 (mmHg)', 'y'),
+    ]
+    RETENTION_HOURS = 12
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Trend Graph")
+        self.resize(1000, 800)
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        # Rentang tampilan awal, pan/zoom tetap bisa ke seluruh retensi
+        self.time_range_combo = QComboBox()
+        self.time_range_combo.addItems(['1 jam', '6 jam', '12 jam'])
+        self.time_range_combo.currentIndexChanged.connect(self.reset_view)
+        layout.addWidget(self.time_range_combo)
+
+        self.view = pg.GraphicsLayoutWidget()
+        self.view.setBackground('black')
+        layout.addWidget(self.view)
+
+        self.plots = {}
+        self.curves = {}
+        first = None
+        for row, (key, title, color) in enumerate(self.PARAMETERS):
+            plot = self.view.addPlot(row=row, col=0, axisItems={'bottom': pg.DateAxisItem()})
+            plot.setLabel('left', title, color='white')
+            plot.showGrid(x=True, y=True, alpha=0.3)
+            plot.setMouseEnabled(x=True, y=False)
+            if first is None:
+                first = plot
+            else:
+                plot.setXLink(first)
+            if row < len(self.PARAMETERS) - 1:
+                plot.hideAxis('bottom')
+            self.plots[key] = plot
+            if key == 'nibp':
+                # NIBP jarang (per pengukuran), tampilkan juga titiknya
+                self.curves['sys'] = plot.plot(pen=color, connect='finite', symbol='o',
+                                               symbolSize=4, symbolBrush=color)
+                self.curves['dias'] = plot.plot(pen=pg.mkPen(color, style=Qt.DashLine), connect='finite',
+                                                symbol='o', symbolSize=4, symbolBrush=color)
+            else:
+                self.curves[key] = plot.plot(pen=color, connect='finite')
+        self.x_plot = first
+
+        # Query ulang setelah pan/zoom berhenti sebentar (debounce)
+        self.reload_timer = QTimer()
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(150)
+        self.reload_timer.timeout.connect(self.load_visible)
+        first.sigXRangeChanged.connect(lambda *args: self.reload_timer.start())
+
+        # Data baru setiap 5 detik selama window terlihat
+        self.refresh_timer = QTimer()
+        self.refresh_timer.setInterval(5000)
+        self.refresh_timer.timeout.connect(self.follow_live)
+
+        self.ok_button = QPushButton("OK")
+        self.ok_button.clicked.connect(self.close)
+        layout.addWidget(self.ok_button)
+
+    @staticmethod
+    def utc_offset():
+        """Selisih detik antara waktu lokal (format di database) dan epoch UTC"""
+        return datetime.now().astimezone().utcoffset().total_seconds()
+
+    def retention_start(self):
+        login = datetime.strptime(get_login_time(), '%Y-%m-%d %H:%M:%S')
+        return max(login, datetime.now() - timedelta(hours=self.RETENTION_HOURS)).timestamp()
+
+    def reset_view(self):
+        hours = {'1 jam': 1, '6 jam': 6}.get(self.time_range_combo.currentText(), 12)
+        now = time.time()
+        start = max(self.retention_start(), now - hours * 3600)
+        self.x_plot.setLimits(xMin=self.retention_start(), xMax=now + 60)
+        self.x_plot.setXRange(start, now, padding=0)
+        self.load_visible()
+
+    def follow_live(self):
+        """Geser tampilan jika sedang melihat data terbaru, lalu muat ulang"""
+        x0, x1 = self.x_plot.viewRange()[0]
+        now = time.time()
+        self.x_plot.setLimits(xMin=self.retention_start(), xMax=now + 60)
+        if now - x1 < 60:
+            self.x_plot.setXRange(x0 + (now - x1), now, padding=0)
+        self.load_visible()
+
+    def query_buckets(self, start, end, bucket):
+        """Agregasi rata-rata per bucket (detik) di SQLite, returns array (n, 8)"""
+        offset = self.utc_offset()
+        fmt = '%Y-%m-%d %H:%M:%S'
+        conn = sqlite3.connect('patient_data.db')
+        try:
+            rows = conn.execute('''
+                SELECT (CAST(strftime('%s', timestamp) AS INTEGER) / ?) * ? AS bucket,
+                       AVG(ecg), AVG(spo2),
+                       AVG(CASE WHEN nibp GLOB '[0-9]*/[0-9]*'
+                           THEN CAST(substr(nibp, 1, instr(nibp, '/') - 1) AS INTEGER) END),
+                       AVG(CASE WHEN nibp GLOB '[0-9]*/[0-9]*'
+                           THEN CAST(substr(nibp, instr(nibp, '/') + 1) AS INTEGER) END),
+                       AVG(resp), AVG(temp), AVG(co2)
+                FROM vital_signs
+                WHERE timestamp BETWEEN ? AND ?
+                GROUP BY bucket
+                ORDER BY bucket
+            ''', (bucket, bucket,
+                  datetime.fromtimestamp(start).strftime(fmt),
+                  datetime.fromtimestamp(end).strftime(fmt))).fetchall()
+        finally:
+            conn.close()
+        data = np.array(rows, dtype=float).reshape(-1, 8)
+        # strftime('%s') menganggap timestamp lokal sebagai UTC
+        data[:, 0] += bucket / 2.0 - offset
+        return data
+
+    def load_visible(self):
+        x0, x1 = self.x_plot.viewRange()[0]
+        width = max(int(self.x_plot.vb.width()), 100)
+        bucket = max(1, int(np.ceil((x1 - x0) / width)))
+        # Ambil sedikit di luar rentang agar garis tidak terputus di tepi
+        try:
+            data = self.query_buckets(x0 - bucket, x1 + bucket, bucket)
+        except sqlite3.Error as e:
+            print(f"Error loading trend: {e}")
+            return
+        # Sisipkan baris NaN di antara bucket yang berjauhan (aplikasi mati), tampil sebagai celah
+        gaps = np.flatnonzero(np.diff(data[:, 0]) > max(2 * bucket, 5)) + 1
+        if len(gaps):
+            # Waktu baris NaN = bucket sesudah sampel sebelum celah; diambil sebelum
+            # insert karena baris ke-k bergeser k posisi setelah np.insert
+            times = data[gaps - 1, 0] + bucket
+            data = np.insert(data, gaps, np.nan, axis=0)
+            data[gaps + np.arange(len(gaps)), 0] = times
+        t = data[:, 0]
+        for column, key in enumerate(['ecg', 'spo2', 'sys', 'dias', 'resp', 'temp', 'co2'], start=1):
+            values = data[:, column]
+            if key in ('sys', 'dias'):
+                # Hubungkan antar pengukuran NIBP saja
+                measured = np.isfinite(values)
+                self.curves[key].setData(t[measured], values[measured])
+            else:
+                self.curves[key].setData(t, values)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.reset_view()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+
 # Main Application
-def main():
+def main(sources=None):
+    """Jalankan aplikasi; sources mis. 'serial' atau 'serial,mqtt' (default DATA_SOURCES)"""
+    if sources:
+        data_sources.DATA_SOURCES = sources
     app = QApplication(sys.argv)
     login_window = LoginWindow()
     login_window.show()
@@ -0,0 +1,302 @@
+"""Benchmark latency publish -> label untuk GUI MQTT (FINAL_GUI_FUNSIONAL.py)
+
+Menjalankan MainWindow headless (Qt offscreen) dengan broker MQTT palsu di
+dalam proses, mengirim vital signs sintetis pada laju dan jumlah bed tertentu,
+lalu mengukur latency dari publish sampai ecgInput.setText (dan sampai baris
+central station untuk topik per-bed).
+
+Contoh:
+    python bench_latency.py --rate 50 --beds 64 --duration 20 --output bench_output.txt
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+FakeMessage = namedtuple('FakeMessage', ['topic', 'payload'])
+
+
+def topic_matches(topic_filter, topic):
+    """MQTT topic matching dengan wildcard + dan #"""
+    filter_parts = topic_filter.split('/')
+    topic_parts = topic.split('/')
+    for i, part in enumerate(filter_parts):
+        if part == '#':
+            return True
+        if i >= len(topic_parts) or (part != '+' and part != topic_parts[i]):
+            return False
+    return len(filter_parts) == len(topic_parts)
+
+
+class FakeBroker:
+    """Broker in-process: publish langsung dikirim ke inbox tiap client"""
+
+    def __init__(self):
+        self.clients = []
+        self.published = 0
+        self.delivered = 0
+        self._lock = threading.Lock()
+
+    def publish(self, topic, payload):
+        with self._lock:
+            self.published += 1
+            clients = list(self.clients)
+        for client in clients:
+            if any(topic_matches(f, topic) for f in client.subscriptions):
+                client.deliver(FakeMessage(topic, payload))
+
+
+class FakeClient:
+    """Pengganti paho.mqtt.client.Client yang terhubung ke FakeBroker"""
+
+    broker = None
+
+    def __init__(self, *args, **kwargs):
+        self.on_connect = None
+        self.on_message = None
+        self.on_disconnect = None
+        self.subscriptions = []
+        self._inbox = []
+        self._lock = threading.Lock()
+        self._socket = None
+        self._connected = False
+
+    def connect_async(self, host, port=1883, keepalive=60):
+        self._host = (host, port, keepalive)
+
+    def reconnect(self):
+        self.broker.clients.append(self)
+        self._socket = object()
+        return 0
+
+    def is_connected(self):
+        return self._connected
+
+    def socket(self):
+        return self._socket
+
+    def subscribe(self, topic, qos=0):
+        topics = topic if isinstance(topic, list) else [(topic, qos)]
+        self.subscriptions.extend(t for t, _ in topics)
+        return 0, 1
+
+    def deliver(self, msg):
+        with self._lock:
+            self._inbox.append(msg)
+
+    def loop(self, timeout=1.0):
+        # Seperti paho: callback dipanggil dari thread yang memanggil loop()
+        if self._socket is None:
+            return 4  # MQTT_ERR_NO_CONN
+        if not self._connected:
+            self._connected = True
+            self.on_connect(self, None, {}, 0)
+        with self._lock:
+            batch, self._inbox = self._inbox, []
+        for msg in batch:
+            self.broker.delivered += 1
+            self.on_message(self, None, msg)
+        return 0
+
+    def disconnect(self):
+        self._socket = None
+        self._connected = False
+        if self in self.broker.clients:
+            self.broker.clients.remove(self)
+        return 0
+
+
+def prepare_workdir(workdir):
+    """Salin file .ui/.json ke direktori kerja agar database asli tidak tersentuh"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    for path in glob.glob(os.path.join(here, '*.ui')) + glob.glob(os.path.join(here, '*.json')):
+        shutil.copy(path, workdir)
+    os.chdir(workdir)
+    sys.path.insert(0, here)
+
+
+def publisher(broker, topic, rate, stop, sent, make_payload):
+    """Publish pada laju tetap (Hz) sampai stop di-set"""
+    interval = 1.0 / rate
+    next_time = time.monotonic()
+    seq = 0
+    while not stop.is_set():
+        payload = make_payload(seq)
+        payload['t_pub'] = time.monotonic()
+        broker.publish(topic, json.dumps(payload).encode())
+        seq += 1
+        sent[topic] = seq
+        next_time += interval
+        delay = next_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def vitals_payload(seq):
+    return {
+        'seq': seq,
+        'hr': 60 + seq % 40,
+        'spo2': 95 + seq % 5,
+        'temp': 36.5,
+        'etco2': 38,
+        'resp': 14,
+        'nibp': '120/80',
+    }
+
+
+def percentiles(values):
+    if not values:
+        return "n/a"
+    ms = np.asarray(values) * 1000.0
+    return (f"p50 {np.percentile(ms, 50):.1f} ms, p99 {np.percentile(ms, 99):.1f} ms, "
+            f"max {ms.max():.1f} ms (n={len(ms)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=float, default=10.0, help='pesan per detik per topik')
+    parser.add_argument('--beds', type=int, default=0, help='jumlah bed di monitoring/<bed>/parameter')
+    parser.add_argument('--duration', type=float, default=10.0, help='lama pengukuran (detik)')
+    parser.add_argument('--display-ms', type=int, default=None, help='override DISPLAY_INTERVAL_MS')
+    parser.add_argument('--workdir', default=None, help='direktori kerja (default: temp)')
+    parser.add_argument('--output', default=None, help='tulis laporan ke file')
+    args = parser.parse_args()
+
+    prepare_workdir(args.workdir or tempfile.mkdtemp(prefix='pm_bench_'))
+
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    app = QApplication(sys.argv)
+
+    import data_sources
+    import FINAL_GUI_FUNSIONAL as gui
+    broker = FakeBroker()
+    FakeClient.broker = broker
+    data_sources.mqtt.Client = FakeClient
+    data_sources.DATA_SOURCES = 'mqtt'
+    if args.display_ms:
+        gui.DISPLAY_INTERVAL_MS = args.display_ms
+
+    t_start = time.monotonic()
+    window = gui.MainWindow()
+    startup = time.monotonic() - t_start
+
+    # Hook: catat latency saat nilai HR benar-benar ditulis ke label
+    label_latency = []
+    current = {}
+    original_update = window.update_from_source
+    original_set_text = window.ecgInput.setText
+
+    def update_from_source(data):
+        current['t_pub'] = data.get('t_pub')
+        original_update(data)
+
+    def set_text(text):
+        original_set_text(text)
+        t_pub = current.pop('t_pub', None)
+        if t_pub is not None:
+            label_latency.append(time.monotonic() - t_pub)
+
+    window.update_from_source = update_from_source
+    window.ecgInput.setText = set_text
+
+    station_latency = []
+    if args.beds:
+        window.show_central_station()
+        original_update_beds = window.station_window.update_beds
+
+        def update_beds(beds):
+            original_update_beds(beds)
+            now = time.monotonic()
+            for bed in beds:
+                t_pub = bed.values.get('t_pub')
+                if t_pub is not None:
+                    station_latency.append(now - t_pub)
+
+        window.station_window.update_beds = update_beds
+        # BedState.apply hanya menyimpan key vital signs, simpan juga t_pub
+        original_apply = gui.BedState.apply
+
+        def apply(bed, data):
+            original_apply(bed, data)
+            bed.values['t_pub'] = data.get('t_pub')
+
+        gui.BedState.apply = apply
+
+    # Frame time loop GUI (chart timer) selama beban
+    frame_gaps = []
+    last_frame = [None]
+
+    def on_frame():
+        now = time.monotonic()
+        if last_frame[0] is not None:
+            frame_gaps.append(now - last_frame[0])
+        last_frame[0] = now
+
+    window.chart_timer.timeout.connect(on_frame)
+
+    stop = threading.Event()
+    sent = {}
+    topics = [data_sources.PARAMETER_TOPIC] + [f"monitoring/bed{b:02d}/parameter" for b in range(args.beds)]
+    threads = [threading.Thread(target=publisher, daemon=True,
+                                args=(broker, topic, args.rate, stop, sent, vitals_payload))
+               for topic in topics]
+    for thread in threads:
+        thread.start()
+
+    QTimer.singleShot(int(args.duration * 1000), app.quit)
+    app.exec_()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    mailbox = window.dispatcher.mailbox
+    published = sum(sent.values())
+    ward_posted = sum(bed.mailbox.posted for bed in window.ward.all_beds())
+    ward_coalesced = sum(bed.mailbox.coalesced for bed in window.ward.all_beds())
+    lost = published - mailbox.posted - ward_posted
+    stats = window.dispatcher.stats()
+    frame_ms = np.asarray(frame_gaps) * 1000.0 if frame_gaps else np.zeros(1)
+
+    lines = [
+        f"rate {args.rate:g} msg/s x {len(topics)} topik ({args.beds} bed), "
+        f"durasi {args.duration:g} s, display interval {gui.DISPLAY_INTERVAL_MS} ms",
+        f"startup MainWindow: {startup * 1000:.0f} ms",
+        f"published {published}, delivered {broker.delivered}, not delivered {lost}",
+        f"ingest: received {stats['received']}, malformed {stats['malformed']}, "
+        f"dropped {stats['dropped']}, waveform queue high water {stats['queue_waveform']['high_water']}",
+        f"main mailbox: posted {mailbox.posted}, displayed {mailbox.taken}, coalesced {mailbox.coalesced}",
+        f"ward mailboxes: posted {ward_posted}, coalesced {ward_coalesced}",
+        f"publish -> ecgInput latency: {percentiles(label_latency)}",
+    ]
+    if args.beds:
+        lines.append(f"publish -> central station latency: {percentiles(station_latency)}")
+    lines.append(f"chart frame interval: p50 {np.percentile(frame_ms, 50):.1f} ms, "
+                 f"p99 {np.percentile(frame_ms, 99):.1f} ms")
+
+    report = "\n".join(lines)
+    print(report)
+    if args.output:
+        output = args.output if os.path.isabs(args.output) else os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), args.output)
+        with open(output, 'w') as file:
+            file.write(report + "\n")
+
+    window.sensor_timer.stop()
+    window.chart_timer.stop()
+    window.datetime_timer.stop()
+    window.dispatcher.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+"""Buffer dan helper untuk grafik waveform (ECG) di MainWindow"""
+import glob
+import hashlib
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+
+class RingBuffer:
+    """Buffer sirkular per channel dengan salinan cermin (mirror)
+
+    Setiap sampel ditulis dua kali (indeks i dan i + capacity), sehingga
+    window `capacity` sampel terakhir selalu berupa slice kontigu dari array
+    yang sama: `view()` tidak mengalokasi atau menyalin data. Append
+    sekaligus satu blok, biayanya sebanding jumlah sampel baru.
+    """
+
+    def __init__(self, capacity, dtype=float):
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=dtype)
+        self._head = 0      # posisi sampel terlama
+        self.total = 0      # jumlah sampel yang pernah di-append
+
+    def append(self, samples):
+        samples = np.asarray(samples, dtype=self._data.dtype)
+        count = len(samples)
+        if not count:
+            return
+        self.total += count
+        if count > self.capacity:
+            samples = samples[-self.capacity:]
+            count = self.capacity
+
+        data, capacity, head = self._data, self.capacity, self._head
+        first = min(count, capacity - head)
+        data[head:head + first] = samples[:first]
+        data[head + capacity:head + capacity + first] = samples[:first]
+        rest = count - first
+        if rest:
+            data[:rest] = samples[first:]
+            data[capacity:capacity + rest] = samples[first:]
+        self._head = (head + count) % capacity
+
+    def view(self):
+        """Window sampel, terlama -> terbaru (view read-only, tanpa salinan)"""
+        view = self._data[self._head:self._head + self.capacity]
+        view.flags.writeable = False
+        return view
+
+    def resize(self, capacity):
+        """Ubah kapasitas sekali (alokasi baru), sampel terbaru dipertahankan"""
+        if capacity == self.capacity:
+            return
+        keep = self.view()[-min(capacity, self.capacity):].copy()
+        total = self.total
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=self._data.dtype)
+        self._head = 0
+        self.append(keep)
+        self.total = total
+
+    def clear(self):
+        self._data[:] = 0
+        self._head = 0
+        self.total = 0
+
+
+class MinMaxDecimator:
+    """Decimasi min/max (envelope) ke sekitar 2 titik per pixel
+
+    Setiap bucket `len(y) // width` sampel diwakili nilai min dan max-nya
+    (urut sesuai waktu), sehingga puncak QRS tetap terlihat. Jika jumlah
+    sampel sudah <= 2 titik per pixel, data dikembalikan apa adanya.
+    Buffer indeks dan output dialokasi sekali per kapasitas (`resize`), tiap
+    frame hanya mengisi ulang; hasil berupa view ke buffer tersebut dan
+    berlaku sampai pemanggilan berikutnya.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = None
+        self.resize(capacity)
+
+    def resize(self, capacity):
+        """Alokasi ulang buffer untuk window `capacity` sampel (bucket minimal 3 sampel)"""
+        if capacity == self.capacity:
+            return
+        self.capacity = capacity
+        buckets = max(capacity // 3, 1)
+        self._steps = np.arange(buckets)
+        self._offset = np.empty(buckets, dtype=np.intp)
+        self._imin = np.empty(buckets, dtype=np.intp)
+        self._imax = np.empty(buckets, dtype=np.intp)
+        self._index = np.empty(2 * buckets, dtype=np.intp)
+        self._x = np.empty(2 * buckets)
+        self._y = np.empty(2 * buckets)
+
+    def __call__(self, x, y, width):
+        buckets = int(width)
+        if buckets <= 0:
+            return x, y
+        factor = len(y) // buckets
+        if factor < 3:
+            return x, y
+        if len(y) > self.capacity:
+            self.resize(len(y))
+        # Sisa sampel terlama dibuang agar bucket terakhir berakhir di sampel terbaru
+        start = len(y) - factor * buckets
+        blocks = y[start:].reshape(buckets, factor)
+        imin = blocks.argmin(axis=1, out=self._imin[:buckets])
+        imax = blocks.argmax(axis=1, out=self._imax[:buckets])
+        offset = np.multiply(self._steps[:buckets], factor, out=self._offset[:buckets])
+        offset += start
+        index = self._index[:2 * buckets]
+        lower, upper = index[0::2], index[1::2]
+        np.minimum(imin, imax, out=lower)
+        np.maximum(imin, imax, out=upper)
+        lower += offset
+        upper += offset
+        return (np.take(x, index, out=self._x[:2 * buckets]),
+                np.take(y, index, out=self._y[:2 * buckets]))
+
+
+class SweepTrace:
+    """Tampilan sweep (erase bar) untuk satu lead, seperti monitor klinis
+
+    Sampel baru ditulis di posisi cursor lalu cursor maju; beberapa sampel di
+    depan cursor dikosongkan (NaN) sebagai celah. Kurva dipecah menjadi
+    beberapa segmen sehingga tiap frame hanya segmen yang berubah yang
+    di-setData dan di-repaint, biayanya sebanding jumlah sampel baru.
+    """
+
+    def __init__(self, plot_item, capacity, sampling_rate, segments=10, gap=None, pen='cyan'):
+        self.sampling_rate = sampling_rate
+        self.fixed_gap = gap
+        self.curves = [plot_item.plot(pen=pen, connect='finite') for _ in range(segments)]
+        self.dirty = set()
+        self.resize(capacity)
+
+    def resize(self, capacity, history=()):
+        """Ubah panjang sweep, `history` (sampel terbaru) ditulis ulang dari kiri"""
+        self.capacity = capacity
+        self.gap = self.fixed_gap if self.fixed_gap is not None else max(1, capacity // 50)
+        self.x = np.arange(capacity) / self.sampling_rate
+        self.y = np.full(capacity, np.nan)
+        self.cursor = 0
+        self.bounds = np.linspace(0, capacity, len(self.curves) + 1).astype(int)
+        self.dirty.update(range(len(self.curves)))
+        if len(history):
+            self.write(history[-(capacity - self.gap):])
+
+    def _mark(self, start, count):
+        """Tandai segmen yang mencakup sampel [start, start + count) (wrap)"""
+        # Sertakan sampel sebelum start: segmen sebelumnya menyambung ke titik ini
+        span = count + 1
+        if span >= self.capacity:
+            self.dirty.update(range(len(self.curves)))
+            return
+        first = (start - 1) % self.capacity
+        last = (first + span - 1) % self.capacity
+        i0 = np.searchsorted(self.bounds, first, 'right') - 1
+        i1 = np.searchsorted(self.bounds, last, 'right') - 1
+        if first + span <= self.capacity:
+            self.dirty.update(range(i0, i1 + 1))
+        else:
+            self.dirty.update(range(i0, len(self.curves)))
+            self.dirty.update(range(0, i1 + 1))
+
+    def _put(self, start, values):
+        first = min(len(values), self.capacity - start)
+        self.y[start:start + first] = values[:first]
+        if first < len(values):
+            self.y[:len(values) - first] = values[first:]
+
+    def write(self, samples):
+        samples = np.asarray(samples, dtype=float)
+        count = len(samples)
+        if not count:
+            return
+        if count > self.capacity - self.gap:
+            # Lebih dari satu sweep, cukup tulis bagian terakhir
+            skip = count - (self.capacity - self.gap)
+            self.cursor = (self.cursor + skip) % self.capacity
+            samples = samples[skip:]
+            count = len(samples)
+        start = self.cursor
+        self._put(start, samples)
+        self.cursor = (start + count) % self.capacity
+        # Celah di depan cursor
+        self.y[self.cursor:self.cursor + self.gap] = np.nan
+        overflow = self.cursor + self.gap - self.capacity
+        if overflow > 0:
+            self.y[:overflow] = np.nan
+        self._mark(start, count + self.gap)
+
+    def render(self):
+        """setData hanya untuk segmen yang berubah sejak frame terakhir"""
+        for index in self.dirty:
+            start = self.bounds[index]
+            # Satu sampel overlap agar segmen bersambung
+            stop = min(self.bounds[index + 1] + 1, self.capacity)
+            self.curves[index].setData(self.x[start:stop], self.y[start:stop])
+        updated = len(self.dirty)
+        self.dirty.clear()
+        return updated
+
+    def clear(self):
+        self.y[:] = np.nan
+        self.cursor = 0
+        self.dirty.update(range(len(self.curves)))
+
+
+class FrameBudget:
+    """Ukur durasi tiap frame grafik terhadap budget (ms)"""
+
+    def __init__(self, budget_ms, history=300):
+        self.budget_ms = budget_ms
+        self.durations = deque(maxlen=history)
+        self.frames = 0
+        self.overruns = 0
+        self._start = None
+
+    def start(self):
+        self._start = time.perf_counter()
+
+    def stop(self):
+        if self._start is None:
+            return 0.0
+        duration = (time.perf_counter() - self._start) * 1000.0
+        self._start = None
+        self.durations.append(duration)
+        self.frames += 1
+        if duration > self.budget_ms:
+            self.overruns += 1
+        return duration
+
+    def stats(self):
+        durations = np.asarray(self.durations) if self.durations else np.zeros(1)
+        return {
+            'budget_ms': self.budget_ms,
+            'p50_ms': round(float(np.percentile(durations, 50)), 2),
+            'p99_ms': round(float(np.percentile(durations, 99)), 2),
+            'frames': self.frames,
+            'overruns': self.overruns,
+        }
+
+
+class WaveformChannel:
+    """Satu channel di registry waveform (ECG, pleth, capnogram, ...)
+
+    Tiap channel punya sampling rate, window, ring buffer dan sumbu waktu
+    sendiri, skala dari unit source ke unit tampilan, dan simulator
+    fallback `simulator(count)` saat device tidak mengirim channel ini.
+    Sisa pecahan sampel per frame dibawa per channel (laju berbeda-beda).
+    """
+
+    def __init__(self, name, sampling_rate, window, scale=1.0, simulator=None):
+        self.name = name
+        self.sampling_rate = sampling_rate
+        self.scale = scale
+        self.simulator = simulator
+        self.device_time = None   # waktu terakhir blok dari device (monotonic)
+        self.carry = 0.0
+        self.buffer = None
+        self.decimator = None
+        self.set_window(window)
+
+    def set_window(self, seconds):
+        """Alokasi ulang buffer, sumbu waktu dan buffer decimasi sekali, history terbaru dipertahankan"""
+        points = int(round(seconds * self.sampling_rate))
+        if self.buffer is None:
+            self.buffer = RingBuffer(points)
+        else:
+            self.buffer.resize(points)
+        if self.decimator is None:
+            self.decimator = MinMaxDecimator(points)
+        else:
+            self.decimator.resize(points)
+        self.window = seconds
+        self.time_axis = np.arange(1 - points, 1) / self.sampling_rate
+
+    def history(self):
+        """Sampel yang sudah benar-benar diterima (tanpa nol awal buffer)"""
+        return self.buffer.view()[-min(self.buffer.total, self.buffer.capacity):]
+
+    def samples_due(self, elapsed):
+        due = elapsed * self.sampling_rate + self.carry
+        count = int(due)
+        self.carry = due - count
+        return count
+
+    def scaled(self, samples):
+        """Unit source -> unit tampilan (tanpa salinan jika skala 1)"""
+        if self.scale == 1.0:
+            return samples
+        return np.asarray(samples, dtype=float) * self.scale
+
+
+def simulate_capnogram(duration, sampling_rate, resp_rate=15, etco2=38.0):
+    """Capnogram sintetis (mmHg): ekspirasi naik cepat ke plateau, inspirasi turun ke nol"""
+    t = np.arange(int(duration * sampling_rate)) / sampling_rate
+    phase = (t * resp_rate / 60.0) % 1.0
+    expiration = 0.6  # I:E sekitar 1:1.5
+    rise = 1.0 - np.exp(-phase / 0.04)
+    plateau = 0.92 + 0.08 * np.minimum(phase / expiration, 1.0)
+    end_tidal = etco2 * (1.0 - np.exp(-expiration / 0.04))
+    co2 = np.where(phase < expiration,
+                   etco2 * rise * plateau,
+                   end_tidal * np.exp(-(phase - expiration) / 0.02))
+    return co2
+
+
+def cached_signal(cache_dir, kind, params, generate):
+    """Sinyal simulasi dari cache .npy (memory-mapped), dibuat sekali per parameter
+
+    Nama file = `kind` + hash `params`, jadi parameter yang berubah otomatis
+    membuat file baru; file lama dengan `kind` yang sama dihapus. File rusak
+    dibuat ulang. cache_dir kosong/None: selalu generate tanpa cache.
+    """
+    if not cache_dir:
+        return np.asarray(generate(), dtype=float)
+    key = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+    path = os.path.join(cache_dir, f'{kind}-{key}.npy')
+    try:
+        return np.load(path, mmap_mode='r')
+    except (OSError, ValueError):
+        pass
+
+    data = np.asarray(generate(), dtype=float)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Tulis ke file sementara lalu rename, instance lain tidak membaca file setengah jadi
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as file:
+            np.save(file, data)
+        os.replace(temp_path, path)
+        for old_path in glob.glob(os.path.join(cache_dir, f'{kind}-*.npy')):
+            if old_path != path:
+                os.remove(old_path)
+    except OSError as e:
+        print(f"Cache sinyal simulasi tidak tersimpan: {e}")
+    return data
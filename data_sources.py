@@ -0,0 +1,1000 @@
+"""Data source layer: MQTT, serial, simulator dan replay dalam satu build
+
+Semua source di-poll (non-blocking) oleh satu dispatch thread milik
+DataDispatcher. Hasil decode diteruskan ke GUI lewat mailbox vital signs
+(latest value) dan antrian terbatas untuk waveform dan alarm.
+"""
+import os
+import glob
+import json
+import time
+import base64
+import struct
+import random
+import binascii
+from collections import deque
+from threading import Thread, Lock, Condition
+
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# MQTT dan serial opsional, cukup terpasang jika source-nya dipakai
+try:
+    import paho.mqtt.client as mqtt
+except ImportError:
+    mqtt = None
+
+try:
+    import serial
+    import serial.tools.list_ports
+except ImportError:
+    serial = None
+
+
+# Source yang dijalankan, dipisah koma: mqtt, serial, sim, replay (butuh MONITOR_REPLAY_FILE),
+# mis. MONITOR_SOURCES=replay,mqtt. Default 'replay' saja jika MONITOR_REPLAY_FILE di-set
+DATA_SOURCES = os.environ.get('MONITOR_SOURCES', 'replay' if os.environ.get('MONITOR_REPLAY_FILE') else 'mqtt,sim')
+
+# Broker MQTT
+MQTT_BROKER = "broker.emqx.io"
+MQTT_PORT = 1883
+MQTT_RECONNECT_MIN = 1   # detik
+MQTT_RECONNECT_MAX = 60
+
+# Topik MQTT
+PARAMETER_TOPIC = "monitoring/parameter"
+WAVEFORM_TOPIC = "monitoring/waveform"
+# Central station: satu topik per bed, monitoring/<bed>/parameter
+BED_TOPIC_FILTER = "monitoring/+/parameter"
+# Alarm dari device: {"level": "critical"/"warning", "message": "..."}
+ALARM_TOPIC = "monitoring/alarm"
+
+# Serial. SERIAL_PORT kosong untuk scan otomatis (/dev/ttyUSB*, /dev/ttyACM*, port COM).
+# Mode 'binary' untuk board front-end baru (waveform 250 Hz), butuh baudrate
+# minimal 115200; 'json' untuk firmware lama (satu JSON per baris)
+SERIAL_PORT = os.environ.get('MONITOR_SERIAL_PORT') or None
+SERIAL_BAUDRATE = int(os.environ.get('MONITOR_SERIAL_BAUDRATE', '9600'))
+SERIAL_PROTOCOL = os.environ.get('MONITOR_SERIAL_PROTOCOL', 'json')
+SERIAL_RECONNECT_MIN = 0.5   # detik
+SERIAL_RECONNECT_MAX = 10
+# Panjang maksimum satu baris JSON; tanpa '\n' (baudrate salah, data binary) buffer dibuang
+SERIAL_LINE_MAX = 65536
+
+# Simulator vital signs, hanya mengirim jika tidak ada data device selama SIM_FALLBACK_AFTER detik
+SIM_INTERVAL = 1.0
+SIM_FALLBACK_AFTER = 5.0
+
+# Rekam semua data mentah ke file, atau putar ulang rekaman (source 'replay').
+# REPLAY_SPEED: 1 = real time, 10 = 10x, 0 = secepatnya
+RECORD_FILE = os.environ.get('MONITOR_RECORD_FILE')
+REPLAY_FILE = os.environ.get('MONITOR_REPLAY_FILE')
+REPLAY_SPEED = float(os.environ.get('MONITOR_REPLAY_SPEED', '1'))
+
+# Kapasitas antrian dispatch thread -> GUI (vital signs lewat LatestValueMailbox)
+WAVEFORM_QUEUE_SIZE = 64
+ALARM_QUEUE_SIZE = 64
+
+# Jeda dispatch thread jika tidak ada source yang punya data (detik)
+DISPATCH_IDLE_SLEEP = 0.005
+
+
+# Binary frame layout (little-endian):
+#   sync (2) | type (1) | payload length (2) | payload (N) | CRC-16/CCITT (2)
+# CRC dihitung dari byte type sampai akhir payload.
+FRAME_SYNC = b'\xa5\x5a'
+FRAME_HEADER = struct.Struct('<BH')        # type, payload length
+FRAME_CRC = struct.Struct('<H')
+FRAME_HEADER_SIZE = len(FRAME_SYNC) + FRAME_HEADER.size
+FRAME_MAX_PAYLOAD = 4096
+
+FRAME_TYPE_WAVEFORM = 0x01
+FRAME_TYPE_VITALS = 0x02
+FRAME_TYPE_ALARM = 0x03
+
+# Waveform payload: n_channels, n_samples, sequence, channel ids, int16 samples interleaved.
+# sequence (u16) naik 1 per frame untuk tiap stream (kumpulan channel id yang sama)
+WAVEFORM_HEADER = struct.Struct('<BHH')
+# Vitals payload: hr, spo2, temp (0.01 C), etco2, resp
+VITALS_PAYLOAD = struct.Struct('<HBhBB')
+# Alarm payload: level (0 warning, 1 critical) lalu pesan UTF-8
+ALARM_LEVELS = ('warning', 'critical')
+
+# Channel id -> nama channel (lihat WAVEFORM_CHANNELS di GUI). Satu frame berisi
+# channel dengan laju sama; pleth (100 Hz) dan co2 (25 Hz) dikirim di frame sendiri
+CHANNEL_NAMES = ('ecg1', 'ecg2', 'ecg3', 'pleth', 'co2')
+# Skala int16 -> unit tampilan per channel id: ECG 1 uV/LSB (mV), pleth 0.001
+# (amplitudo relatif, rentang -0.5..2.5), CO2 0.01 mmHg/LSB (sampai 327 mmHg)
+CHANNEL_SCALES = (0.001, 0.001, 0.001, 0.001, 0.01)
+
+
+class BinaryFrameParser:
+    """Parse binary frames in place from a reusable receive buffer"""
+
+    def __init__(self, buffer_size=65536, channel_scales=CHANNEL_SCALES):
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+        self.channel_scales = channel_scales  # per channel id, int16 -> unit tampilan
+
+        # Statistik untuk debugging link serial
+        self.frames = 0
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+        self.sequence_gaps = 0
+        # Sequence terakhir per stream frame (kumpulan channel id): ECG, pleth dan
+        # co2 dikirim di frame sendiri, masing-masing boleh punya counter sendiri
+        self.last_sequence = {}
+
+    def writable(self, size):
+        """Return a view of at most `size` free bytes at the end of the buffer"""
+        if len(self.buffer) - self.end < size:
+            # Geser sisa data yang belum diparse ke awal buffer
+            remaining = self.end - self.start
+            self.buffer[:remaining] = self.buffer[self.start:self.end]
+            self.start = 0
+            self.end = remaining
+        return self.view[self.end:min(self.end + size, len(self.buffer))]
+
+    def commit(self, count):
+        self.end += count
+
+    def feed(self, data):
+        """Copy raw bytes into the buffer (untuk data yang tidak dibaca via readinto)"""
+        data = memoryview(data)
+        while len(data):
+            target = self.writable(len(data))
+            if not len(target):
+                # Buffer penuh tanpa satu frame valid pun, buang semuanya
+                self.skipped_bytes += self.end - self.start
+                self.start = self.end = 0
+                continue
+            count = len(target)
+            target[:] = data[:count]
+            self.commit(count)
+            data = data[count:]
+
+    def parse(self):
+        """Parse all complete frames, returns (waveforms, vitals, alarms)
+
+        waveforms: dict nama channel -> list of numpy blocks
+        vitals, alarms: list of dict
+        """
+        waveforms = {}
+        vitals = []
+        alarms = []
+        buf = self.buffer
+        pos = self.start
+        end = self.end
+
+        while True:
+            idx = buf.find(FRAME_SYNC, pos, end)
+            if idx < 0:
+                # Simpan byte terakhir, bisa jadi awal sync word berikutnya
+                keep = end - 1 if end > pos and buf[end - 1] == FRAME_SYNC[0] else end
+                self.skipped_bytes += keep - pos
+                pos = keep
+                break
+            self.skipped_bytes += idx - pos
+
+            if end - idx < FRAME_HEADER_SIZE:
+                pos = idx
+                break
+            frame_type, length = FRAME_HEADER.unpack_from(buf, idx + len(FRAME_SYNC))
+            if length > FRAME_MAX_PAYLOAD:
+                # Panjang tidak masuk akal, resync dari byte berikutnya
+                self.crc_errors += 1
+                pos = idx + 1
+                continue
+
+            payload_start = idx + FRAME_HEADER_SIZE
+            payload_end = payload_start + length
+            if end - payload_end < FRAME_CRC.size:
+                pos = idx
+                break
+
+            crc, = FRAME_CRC.unpack_from(buf, payload_end)
+            if binascii.crc_hqx(self.view[idx + len(FRAME_SYNC):payload_end], 0xFFFF) != crc:
+                self.crc_errors += 1
+                pos = idx + 1
+                continue
+
+            self.frames += 1
+            if frame_type == FRAME_TYPE_WAVEFORM:
+                self._parse_waveform(payload_start, length, waveforms)
+            elif frame_type == FRAME_TYPE_VITALS and length >= VITALS_PAYLOAD.size:
+                hr, spo2, temp, etco2, resp = VITALS_PAYLOAD.unpack_from(buf, payload_start)
+                vitals.append({'hr': hr, 'spo2': spo2, 'temp': temp / 100.0,
+                               'etco2': etco2, 'resp': resp})
+            elif frame_type == FRAME_TYPE_ALARM and length >= 1:
+                level = buf[payload_start]
+                alarms.append({
+                    'level': ALARM_LEVELS[level] if level < len(ALARM_LEVELS) else 'critical',
+                    'message': bytes(buf[payload_start + 1:payload_end]).decode('utf-8', 'replace'),
+                })
+            pos = payload_end + FRAME_CRC.size
+
+        self.start = pos
+        if self.start == self.end:
+            self.start = self.end = 0
+        return waveforms, vitals, alarms
+
+    def _parse_waveform(self, offset, length, waveforms):
+        if length < WAVEFORM_HEADER.size:
+            return
+        n_channels, n_samples, sequence = WAVEFORM_HEADER.unpack_from(self.buffer, offset)
+        data_offset = offset + WAVEFORM_HEADER.size + n_channels
+        if n_channels == 0 or data_offset + n_channels * n_samples * 2 > offset + length:
+            return
+
+        channel_ids = self.buffer[offset + WAVEFORM_HEADER.size:data_offset]
+        stream = bytes(channel_ids)
+        last = self.last_sequence.get(stream)
+        if last is not None and sequence != (last + 1) & 0xFFFF:
+            self.sequence_gaps += 1
+        self.last_sequence[stream] = sequence
+
+        block = np.frombuffer(self.buffer, dtype='<i2', count=n_channels * n_samples,
+                              offset=data_offset).reshape(n_samples, n_channels)
+        for column, channel_id in enumerate(channel_ids):
+            if channel_id < len(CHANNEL_NAMES):
+                # Perkalian membuat salinan, jadi buffer aman dipakai ulang
+                samples = block[:, column] * self.channel_scales[channel_id]
+                waveforms.setdefault(CHANNEL_NAMES[channel_id], []).append(samples)
+        del block
+
+
+def decode_waveform_message(data, rates=None):
+    """Decode batched waveform message into dict lead -> numpy array
+
+    Format payload di WAVEFORM_TOPIC:
+        {"fs": 250, "encoding": "i16le", "scale": 0.001,
+         "leads": {"ecg1": "<base64 int16>", "ecg2": ..., "ecg3": ...}}
+    Tanpa "encoding", setiap lead berupa list angka (mV). Channel lain
+    (mis. "pleth", "co2") dikirim dengan cara yang sama dalam unit masing-masing.
+    `rates`: sampling rate channel di GUI; "fs" yang berbeda -> ValueError
+    (pesan dihitung malformed, tidak diplot dengan skala waktu yang salah).
+    """
+    leads = data.get('leads', {})
+    encoding = data.get('encoding')
+    scale = float(data.get('scale', 1.0))
+    fs = data.get('fs')
+    samples = {}
+    for lead, values in leads.items():
+        expected = rates.get(lead) if rates and fs is not None else None
+        if expected is not None and float(fs) != expected:
+            raise ValueError(f"fs {fs} Hz untuk {lead}, channel {expected} Hz")
+        if encoding == 'i16le':
+            raw = np.frombuffer(base64.b64decode(values), dtype='<i2')
+            samples[lead] = raw * scale
+        else:
+            samples[lead] = np.asarray(values, dtype=float) * scale
+    return samples
+
+
+# Rekaman stream mentah: header REC_MAGIC, lalu record berurutan
+#   timestamp (float64) | panjang topic (u16) | panjang payload (u32) | topic | payload
+REC_MAGIC = b'PMREC1\n'
+REC_HEADER = struct.Struct('<dHI')
+SERIAL_RECORD_TOPIC = 'serial'
+
+
+class StreamRecorder:
+    """Append-only recorder untuk data mentah yang diterima transport"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(REC_MAGIC)
+        self._lock = Lock()
+        self._last_flush = time.monotonic()
+        self.records = 0
+
+    def write(self, topic, payload, timestamp=None):
+        """timestamp: default waktu sekarang; diisi untuk rekaman sintetis (simulate_scenario.py)"""
+        topic = topic.encode()
+        with self._lock:
+            self.file.write(REC_HEADER.pack(time.time() if timestamp is None else timestamp,
+                                            len(topic), len(payload)))
+            self.file.write(topic)
+            self.file.write(payload)
+            self.records += 1
+            # Flush berkala agar rekaman tetap ada walau aplikasi crash
+            now = time.monotonic()
+            if now - self._last_flush > 1.0:
+                self.file.flush()
+                self._last_flush = now
+
+    def close(self):
+        with self._lock:
+            self.file.close()
+
+
+def read_recording(path):
+    """Yield (timestamp, topic, payload) dari file rekaman"""
+    with open(path, 'rb') as file:
+        if file.read(len(REC_MAGIC)) != REC_MAGIC:
+            raise ValueError(f"{path} bukan file rekaman stream")
+        while True:
+            header = file.read(REC_HEADER.size)
+            if len(header) < REC_HEADER.size:
+                return
+            timestamp, topic_len, payload_len = REC_HEADER.unpack(header)
+            topic = file.read(topic_len).decode()
+            payload = file.read(payload_len)
+            if len(payload) < payload_len:
+                return  # Record terakhir terpotong
+            yield timestamp, topic, payload
+
+
+class LatestValueMailbox:
+    """Snapshot vital signs terbaru antara thread pembaca dan GUI
+
+    Thread pembaca menimpa snapshot (per key), GUI mengambilnya pada display
+    rate tetap. Pesan yang tertimpa sebelum sempat diambil dihitung di `coalesced`.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._snapshot = None
+        self.posted = 0
+        self.taken = 0
+        self.coalesced = 0
+
+    def post(self, data):
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = dict(data)
+            else:
+                self._snapshot.update(data)
+                self.coalesced += 1
+            self.posted += 1
+
+    def take(self):
+        """Ambil snapshot terbaru (None jika tidak ada data baru)"""
+        with self._lock:
+            snapshot, self._snapshot = self._snapshot, None
+            if snapshot is not None:
+                self.taken += 1
+            return snapshot
+
+    def stats(self):
+        # Pesan yang tertimpa = drop counter mailbox
+        return {'posted': self.posted, 'taken': self.taken, 'coalesced': self.coalesced}
+
+
+class HandoffQueue:
+    """Antrian terbatas dari thread pembaca ke GUI
+
+    policy 'drop_oldest': item terlama dibuang saat penuh (vital signs, waveform).
+    policy 'never_drop': thread pembaca menunggu sampai ada tempat (alarm).
+    """
+
+    def __init__(self, maxlen, policy='drop_oldest'):
+        self.maxlen = maxlen
+        self.policy = policy
+        self._items = deque()
+        self._cond = Condition()
+        self._closed = False
+        self.dropped = 0
+        self.blocked = 0
+        self.high_water = 0
+
+    def put(self, item):
+        """Returns True jika antrian sebelumnya kosong (GUI perlu dibangunkan)"""
+        with self._cond:
+            if len(self._items) >= self.maxlen:
+                if self.policy == 'never_drop':
+                    self.blocked += 1
+                    while len(self._items) >= self.maxlen and not self._closed:
+                        self._cond.wait(0.5)
+                else:
+                    self._items.popleft()
+                    self.dropped += 1
+            was_empty = not self._items
+            self._items.append(item)
+            self.high_water = max(self.high_water, len(self._items))
+            return was_empty
+
+    def drain(self):
+        with self._cond:
+            items, self._items = self._items, deque()
+            self._cond.notify_all()
+            return items
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {'depth': len(self._items), 'high_water': self.high_water,
+                    'dropped': self.dropped, 'blocked': self.blocked}
+
+
+class DataSource:
+    """Interface source data untuk DataDispatcher
+
+    Semua method dipanggil dari dispatch thread. `poll` tidak boleh memblok:
+    kerjakan data yang sudah tersedia lalu return True jika ada yang dikerjakan.
+    """
+
+    name = 'source'
+    # Source perangkat sungguhan menahan simulator fallback
+    is_device = True
+
+    def __init__(self):
+        self.dispatcher = None
+
+    def open(self, dispatcher):
+        self.dispatcher = dispatcher
+
+    def poll(self):
+        return False
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class SerialDecoder:
+    """Decode byte serial (JSON per baris atau binary frame) ke dispatcher"""
+
+    def __init__(self, dispatcher, protocol='json'):
+        self.dispatcher = dispatcher
+        self.protocol = protocol
+        self.parser = BinaryFrameParser()
+        self.line_buffer = bytearray()
+
+    def feed(self, data):
+        if self.protocol == 'binary':
+            self.parser.feed(data)
+            self.process_frames()
+        else:
+            self.line_buffer += data
+            *lines, rest = self.line_buffer.split(b'\n')
+            if len(rest) > SERIAL_LINE_MAX:
+                self.dispatcher.count_malformed(f"baris tanpa newline > {SERIAL_LINE_MAX} byte, dibuang")
+                rest = b''
+            self.line_buffer = bytearray(rest)
+            for raw in lines:
+                self.handle_line(raw)
+
+    def handle_line(self, raw):
+        line = raw.decode(errors='replace').strip()
+        if not line:
+            return
+        self.dispatcher.received += 1
+        if line.startswith("{") and line.endswith("}"):
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                self.dispatcher.count_malformed(e)
+                return
+            if 'alarm' in data:
+                # {"alarm": "Lead off", "level": "critical"}
+                self.dispatcher.route_alarm({'level': data.get('level', 'warning'),
+                                             'message': data['alarm']})
+            else:
+                self.dispatcher.route_vitals(data)
+        else:
+            self.dispatcher.count_malformed(f"bukan JSON: {line[:40]!r}")
+
+    def process_frames(self):
+        frames = self.parser.frames
+        waveforms, vitals, alarms = self.parser.parse()
+        self.dispatcher.received += self.parser.frames - frames
+        for data in alarms:
+            self.dispatcher.route_alarm(data)
+        if waveforms:
+            self.dispatcher.route_waveform({
+                signal_type: blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+                for signal_type, blocks in waveforms.items()
+            })
+        for data in vitals:
+            self.dispatcher.route_vitals(data)
+
+    def stats(self):
+        return {'crc_errors': self.parser.crc_errors,
+                'sequence_gaps': self.parser.sequence_gaps}
+
+
+def find_serial_ports(preferred=None):
+    """Daftar port kandidat, port pilihan (jika ada) dicoba lebih dulu"""
+    ports = sorted(glob.glob('/dev/ttyUSB*')) + sorted(glob.glob('/dev/ttyACM*'))
+    try:
+        for info in serial.tools.list_ports.comports():
+            if info.device not in ports and (info.vid is not None or info.device.startswith('COM')):
+                ports.append(info.device)
+    except Exception as e:
+        print(f"[WARN] Gagal membaca daftar port: {e}")
+    if preferred:
+        ports = [preferred] + [p for p in ports if p != preferred]
+    return ports
+
+
+class SerialSource(DataSource):
+    """Device serial, dibaca non-blocking dan reconnect dengan exponential backoff"""
+
+    name = 'serial'
+
+    def __init__(self, port=None, baudrate=115200, protocol='json'):
+        super().__init__()
+        if serial is None:
+            raise RuntimeError("Source 'serial' membutuhkan paket pyserial")
+        self.port = port  # None = scan otomatis
+        self.baudrate = baudrate
+        self.protocol = protocol  # 'json' (firmware lama) atau 'binary'
+        self.ser = None
+        self.decoder = None
+
+        # Status koneksi untuk mengukur waktu reconnect
+        self.backoff = SERIAL_RECONNECT_MIN
+        self.next_attempt = 0.0
+        self.started = None
+        self.connected_port = None
+        self.connect_attempts = 0
+        self.reconnects = 0
+        self.disconnected_at = None
+        self.last_reconnect_time = None
+
+    def open(self, dispatcher):
+        super().open(dispatcher)
+        self.decoder = SerialDecoder(dispatcher, self.protocol)
+        self.started = time.monotonic()
+
+    def open_port(self):
+        for port in find_serial_ports(self.port):
+            self.connect_attempts += 1
+            try:
+                ser = serial.Serial(port, self.baudrate, timeout=0)
+            except (serial.SerialException, OSError):
+                continue
+            self.connected_port = port
+            print(f"[INFO] Serial connected: {port} @ {self.baudrate}")
+            return ser
+        return None
+
+    def connect(self):
+        now = time.monotonic()
+        if now < self.next_attempt:
+            return False
+        self.ser = self.open_port()
+        if self.ser is None:
+            self.next_attempt = now + self.backoff
+            self.backoff = min(self.backoff * 2, SERIAL_RECONNECT_MAX)
+            return False
+
+        if self.disconnected_at is not None:
+            self.reconnects += 1
+            self.last_reconnect_time = now - self.disconnected_at
+            print(f"[INFO] Serial reconnected ke {self.connected_port} "
+                  f"setelah {self.last_reconnect_time:.1f} s")
+        else:
+            self.last_reconnect_time = now - self.started
+        self.disconnected_at = None
+        self.backoff = SERIAL_RECONNECT_MIN
+        return True
+
+    def poll(self):
+        if self.ser is None and not self.connect():
+            return False
+        try:
+            # timeout=0: hanya membaca byte yang sudah ada di buffer OS
+            if self.protocol == 'binary':
+                parser = self.decoder.parser
+                target = parser.writable(max(self.ser.in_waiting, 1))
+                count = self.ser.readinto(target)
+                if count:
+                    self.dispatcher.record(SERIAL_RECORD_TOPIC, target[:count])
+                del target
+                if not count:
+                    return False
+                parser.commit(count)
+                self.decoder.process_frames()
+            else:
+                data = self.ser.read(max(self.ser.in_waiting, 1))
+                if not data:
+                    return False
+                self.dispatcher.record(SERIAL_RECORD_TOPIC, data)
+                self.decoder.feed(data)
+            return True
+        except (serial.SerialException, OSError) as e:
+            # Kabel dicabut / device reset
+            print(f"[ERROR] Serial connection lost: {e}")
+            self.close()
+            self.disconnected_at = time.monotonic()
+            self.next_attempt = self.disconnected_at + self.backoff
+            return False
+
+    def close(self):
+        if self.ser is not None:
+            try:
+                self.ser.close()
+            except (serial.SerialException, OSError):
+                pass
+            self.ser = None
+        self.connected_port = None
+
+    def stats(self):
+        stats = {
+            'port': self.connected_port,
+            'connect_attempts': self.connect_attempts,
+            'reconnects': self.reconnects,
+            'last_reconnect_s': (round(self.last_reconnect_time, 2)
+                                 if self.last_reconnect_time is not None else None),
+        }
+        if self.decoder is not None:
+            stats.update(self.decoder.stats())
+        return stats
+
+
+def handle_mqtt_message(dispatcher, topic, payload):
+    """Decode satu pesan MQTT (juga dipakai untuk replay rekaman MQTT)"""
+    dispatcher.received += 1
+    try:
+        data = json.loads(payload.decode())
+        parts = topic.split('/')
+        if len(parts) == 3 and parts[2] == 'parameter':
+            # monitoring/<bed>/parameter -> state bed masing-masing
+            dispatcher.route_bed(parts[1], data)
+        elif topic == WAVEFORM_TOPIC:
+            dispatcher.route_waveform(decode_waveform_message(data, dispatcher.channel_rates))
+        elif topic == ALARM_TOPIC:
+            dispatcher.route_alarm(data)
+        else:
+            dispatcher.route_vitals(data)
+    except Exception as e:
+        dispatcher.count_malformed(e)
+
+
+class MQTTSource(DataSource):
+    """Broker MQTT, network loop paho dijalankan manual dari dispatch thread
+
+    Connect TCP (blocking) dikerjakan thread pendek terpisah agar source lain
+    tetap berjalan; setelah tersambung hanya `loop(timeout=0)` yang dipanggil.
+    """
+
+    name = 'mqtt'
+
+    def __init__(self, host=MQTT_BROKER, port=MQTT_PORT):
+        super().__init__()
+        if mqtt is None:
+            raise RuntimeError("Source 'mqtt' membutuhkan paket paho-mqtt")
+        self.host = host
+        self.port = port
+        self.client = mqtt.Client()
+        self.client.on_connect = self.on_connect
+        self.client.on_disconnect = self.on_disconnect
+        self.client.on_message = self.on_message
+
+        self.connected = False
+        self.connecting = False
+        self.backoff = MQTT_RECONNECT_MIN
+        self.next_attempt = 0.0
+        self.started = None
+        self.disconnected_at = None
+        self.reconnects = 0
+        self.last_reconnect_time = None
+
+    def open(self, dispatcher):
+        super().open(dispatcher)
+        self.started = time.monotonic()
+        self.client.connect_async(self.host, self.port, 60)
+
+    def start_connect(self):
+        def run():
+            try:
+                self.client.reconnect()
+            except Exception as e:
+                print(f"MQTT connect gagal: {e}")
+                self.schedule_reconnect()
+            finally:
+                self.connecting = False
+
+        self.connecting = True
+        Thread(target=run, daemon=True).start()
+
+    def schedule_reconnect(self):
+        self.next_attempt = time.monotonic() + self.backoff
+        self.backoff = min(self.backoff * 2, MQTT_RECONNECT_MAX)
+
+    def poll(self):
+        if self.connecting:
+            return False
+        if not self.client.is_connected() and self.client.socket() is None:
+            if time.monotonic() >= self.next_attempt:
+                self.start_connect()
+            return False
+
+        received = self.dispatcher.received
+        rc = self.client.loop(timeout=0)
+        if rc != 0:
+            # paho sudah menutup socket dan memanggil on_disconnect
+            self.connected = False
+            self.schedule_reconnect()
+            return False
+        return self.dispatcher.received != received
+
+    def on_connect(self, client, userdata, flags, rc):
+        print("Connected with result code "+str(rc))
+        if rc != 0:
+            return
+        now = time.monotonic()
+        if self.disconnected_at is not None:
+            self.reconnects += 1
+            self.last_reconnect_time = now - self.disconnected_at
+            print(f"MQTT reconnected setelah {self.last_reconnect_time:.1f} s")
+        else:
+            self.last_reconnect_time = now - self.started
+        self.connected = True
+        self.disconnected_at = None
+        self.backoff = MQTT_RECONNECT_MIN
+        client.subscribe([(PARAMETER_TOPIC, 0), (WAVEFORM_TOPIC, 0), (BED_TOPIC_FILTER, 0),
+                          (ALARM_TOPIC, 0)])
+
+    def on_disconnect(self, client, userdata, rc):
+        self.connected = False
+        if rc != 0 and self.disconnected_at is None:
+            self.disconnected_at = time.monotonic()
+            print(f"MQTT terputus (rc={rc}), mencoba reconnect...")
+
+    def on_message(self, client, userdata, msg):
+        self.dispatcher.record(msg.topic, msg.payload)
+        handle_mqtt_message(self.dispatcher, msg.topic, msg.payload)
+
+    def close(self):
+        self.client.disconnect()
+
+    def stats(self):
+        return {
+            'connected': self.connected,
+            'reconnects': self.reconnects,
+            'last_reconnect_s': (round(self.last_reconnect_time, 2)
+                                 if self.last_reconnect_time is not None else None),
+        }
+
+
+class SimulatorSource(DataSource):
+    """Vital signs acak, sebagai fallback saat tidak ada data dari device"""
+
+    name = 'sim'
+    is_device = False
+
+    def __init__(self, interval=SIM_INTERVAL, fallback_only=True):
+        super().__init__()
+        self.interval = interval
+        self.fallback_only = fallback_only
+        self.next_time = 0.0
+        self.sent = 0
+
+    def poll(self):
+        now = time.monotonic()
+        if now < self.next_time:
+            return False
+        self.next_time = now + self.interval
+        last_device = self.dispatcher.last_device_vitals
+        if self.fallback_only and last_device is not None and now - last_device < SIM_FALLBACK_AFTER:
+            return False
+        self.dispatcher.route_vitals({
+            'hr': random.randint(60, 100),
+            'spo2': random.randint(90, 100),
+            'temp': round(random.uniform(36.0, 38.0), 1),
+            'etco2': random.randint(30, 45),
+        }, source=self)
+        self.sent += 1
+        return True
+
+    def stats(self):
+        return {'sent': self.sent}
+
+
+class ReplaySource(DataSource):
+    """Putar ulang rekaman StreamRecorder lewat decoder yang sama dengan device
+
+    speed 1.0 = real time, 10.0 = 10x lebih cepat, 0 = secepatnya.
+    """
+
+    name = 'replay'
+    # Jumlah record maksimum per poll pada speed 0, agar source lain tetap jalan
+    BATCH = 500
+
+    def __init__(self, path, speed=1.0, serial_protocol='json'):
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        self.serial_protocol = serial_protocol
+        self.records = None
+        self.pending = None
+        self.start_wall = self.start_ts = None
+        self.count = 0
+        self.finished = False
+
+    def open(self, dispatcher):
+        super().open(dispatcher)
+        self.records = read_recording(self.path)
+        self.serial_decoder = SerialDecoder(dispatcher, self.serial_protocol)
+
+    def poll(self):
+        if self.finished:
+            return False
+        handled = 0
+        now = time.monotonic()
+        while handled < self.BATCH:
+            if self.pending is None:
+                self.pending = next(self.records, None)
+                if self.pending is None:
+                    self.finished = True
+                    print(f"Replay {self.path} selesai ({self.count} record)")
+                    break
+            timestamp, topic, payload = self.pending
+            if self.speed:
+                if self.start_wall is None:
+                    self.start_wall, self.start_ts = now, timestamp
+                if (timestamp - self.start_ts) / self.speed > now - self.start_wall:
+                    break
+            if topic == SERIAL_RECORD_TOPIC:
+                self.serial_decoder.feed(payload)
+            else:
+                handle_mqtt_message(self.dispatcher, topic, payload)
+            self.pending = None
+            self.count += 1
+            handled += 1
+        return handled > 0
+
+    def stats(self):
+        return {'replayed': self.count, 'finished': self.finished}
+
+
+def create_sources(spec=None):
+    """Buat source dari daftar nama dipisah koma (lihat DATA_SOURCES)"""
+    sources = []
+    for name in (spec or DATA_SOURCES).split(','):
+        name = name.strip()
+        if name == 'mqtt':
+            sources.append(MQTTSource())
+        elif name == 'serial':
+            sources.append(SerialSource(SERIAL_PORT, SERIAL_BAUDRATE, SERIAL_PROTOCOL))
+        elif name == 'sim':
+            sources.append(SimulatorSource())
+        elif name == 'replay':
+            if not REPLAY_FILE:
+                raise ValueError("Source replay butuh MONITOR_REPLAY_FILE")
+            sources.append(ReplaySource(REPLAY_FILE, REPLAY_SPEED, SERIAL_PROTOCOL))
+        elif name:
+            raise ValueError(f"Source tidak dikenal: {name}")
+    return sources
+
+
+class DataDispatcher(QObject):
+    """Jalankan semua source di satu dispatch thread dan serahkan hasilnya ke GUI
+
+    Vital signs hanya masuk LatestValueMailbox (diambil GUI pada display rate,
+    tanpa sinyal per pesan); waveform dan alarm lewat HandoffQueue. Sinyal
+    queue_ready hanya dikirim saat antrian berubah dari kosong sehingga event
+    queue Qt tidak tumbuh; drain_queues lalu meneruskan isi antrian ke
+    waveform_received / alarm_received di thread GUI.
+    """
+    waveform_received = pyqtSignal(dict)
+    alarm_received = pyqtSignal(dict)
+    queue_ready = pyqtSignal()
+
+    def __init__(self, sources):
+        super().__init__()
+        self.sources = list(sources)
+        self.mailbox = LatestValueMailbox()
+        self.queues = {
+            'waveform': HandoffQueue(WAVEFORM_QUEUE_SIZE, 'drop_oldest'),
+            'alarm': HandoffQueue(ALARM_QUEUE_SIZE, 'never_drop'),
+        }
+        self.recorder = StreamRecorder(RECORD_FILE) if RECORD_FILE else None
+        # Dipanggil (dari dispatch thread) untuk data per-bed, diisi oleh GUI
+        self.bed_handler = None
+        # Sampling rate per channel (Hz) untuk cek "fs" waveform MQTT, diisi oleh GUI
+        self.channel_rates = {}
+
+        self.received = 0
+        self.malformed = 0
+        self.source_errors = {}
+        self.last_device_vitals = None
+        self.running = False
+        self.thread = None
+        self.queue_ready.connect(self.drain_queues)
+
+    def start(self):
+        for source in self.sources:
+            source.open(self)
+        self.running = True
+        self.thread = Thread(target=self.run, name='data-dispatch', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            busy = False
+            for source in self.sources:
+                try:
+                    busy = source.poll() or busy
+                except Exception as e:
+                    self.count_source_error(source, e)
+            if not busy:
+                time.sleep(DISPATCH_IDLE_SLEEP)
+
+    def stop(self):
+        self.running = False
+        for queue in self.queues.values():
+            queue.close()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+        for source in self.sources:
+            source.close()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    # --- dipanggil dari dispatch thread oleh source ---
+
+    def record(self, topic, payload):
+        if self.recorder is not None:
+            self.recorder.write(topic, payload)
+
+    def route_vitals(self, data, source=None):
+        if source is None or source.is_device:
+            self.last_device_vitals = time.monotonic()
+        self.mailbox.post(data)
+
+    def route_waveform(self, leads):
+        self.enqueue('waveform', leads)
+
+    def route_alarm(self, data):
+        self.enqueue('alarm', data)
+
+    def route_bed(self, bed_id, data):
+        if self.bed_handler is not None:
+            self.bed_handler(bed_id, data)
+
+    def count_malformed(self, error):
+        self.malformed += 1
+        if self.malformed % 100 == 1:
+            print(f"Error processing message ({self.malformed} malformed): {error}")
+
+    def count_source_error(self, source, error):
+        # Source yang terus gagal bisa error tiap poll, log dibatasi seperti count_malformed
+        count = self.source_errors.get(source.name, 0) + 1
+        self.source_errors[source.name] = count
+        if count % 100 == 1:
+            print(f"Error pada source {source.name} ({count} error): {error}")
+
+    def enqueue(self, name, item):
+        if self.queues[name].put(item):
+            self.queue_ready.emit()
+
+    # --- thread GUI ---
+
+    def drain_queues(self):
+        """Dipanggil di thread GUI, teruskan isi antrian ke sinyal masing-masing"""
+        for data in self.queues['alarm'].drain():
+            self.alarm_received.emit(data)
+        for leads in self.queues['waveform'].drain():
+            self.waveform_received.emit(leads)
+
+    def stats(self):
+        """Counter ingestion untuk inspeksi saat runtime"""
+        stats = {
+            'received': self.received,
+            'malformed': self.malformed,
+            'source_errors': dict(self.source_errors),
+            'dropped': sum(q.dropped for q in self.queues.values()),
+            'coalesced': self.mailbox.coalesced,
+            'mailbox_vitals': self.mailbox.stats(),
+        }
+        for name, queue in self.queues.items():
+            stats[f'queue_{name}'] = queue.stats()
+        for source in self.sources:
+            stats[f'source_{source.name}'] = source.stats()
+        return stats
@@ -0,0 +1,436 @@
+"""Model sinyal ECG untuk simulator: vektor jantung dan proyeksi lead ekstremitas"""
+import numpy as np
+from scipy.signal import butter, find_peaks, lfilter, lfilter_zi
+
+# Sudut lead pada bidang frontal (derajat, sistem heksaksial: 0 = kiri, 90 = bawah)
+# dan penguatan relatif; lead augmented = sqrt(3)/2 dari proyeksi vektor
+LIMB_LEADS = {
+    'I': (0, 1.0),
+    'II': (60, 1.0),
+    'III': (120, 1.0),
+    'aVR': (-150, np.sqrt(3) / 2),
+    'aVL': (-30, np.sqrt(3) / 2),
+    'aVF': (90, np.sqrt(3) / 2),
+}
+
+
+def lead_matrix(leads):
+    """Matriks (n_lead, 2): baris = gain * (cos, sin) sudut lead"""
+    angles = np.radians([LIMB_LEADS[lead][0] for lead in leads])
+    gains = np.array([LIMB_LEADS[lead][1] for lead in leads])
+    return gains[:, None] * np.column_stack((np.cos(angles), np.sin(angles)))
+
+
+def cardiac_vector(ecg, sampling_rate, axis=60, loop=0.25, delay=0.02):
+    """Vektor jantung (2, n) dari satu ECG simulasi (dianggap sebagai lead II)
+
+    Komponen searah sumbu listrik = ECG; komponen tegak lurus = ECG yang
+    digeser `delay` detik dikali `loop`, sehingga vektor membentuk loop
+    (morfologi tiap lead berbeda) dan proyeksi ke sumbu tetap sama dengan ECG.
+    """
+    ecg = np.asarray(ecg, dtype=float)
+    ortho = loop * np.roll(ecg, int(round(delay * sampling_rate)))
+    angle = np.radians(axis)
+    rotation = np.array([[np.cos(angle), -np.sin(angle)],
+                         [np.sin(angle), np.cos(angle)]])
+    return rotation @ np.vstack((ecg, ortho))
+
+
+def project_leads(vector, leads=('I', 'II', 'III')):
+    """Proyeksi vektor jantung ke lead (satu perkalian matriks), hasil (n_lead, n)
+
+    Hubungan Einthoven berlaku otomatis: II = I + III, aVR + aVL + aVF = 0.
+    """
+    return lead_matrix(leads) @ vector
+
+
+# Gelombang satu beat lead II (template Gaussian, mirip ecgsyn): posisi relatif
+# puncak R (detik), lebar (detik), amplitudo (mV). Posisi/lebar T diskalakan
+# sqrt(RR) (koreksi Bazett) sehingga QT memendek saat HR naik.
+BEAT_WAVES = (
+    ('P', -0.20, 0.025, 0.15),
+    ('Q', -0.03, 0.010, -0.10),
+    ('R', 0.00, 0.012, 1.20),
+    ('S', 0.03, 0.010, -0.25),
+    ('T', 0.25, 0.050, 0.30),
+)
+BEAT_PRE = 0.3  # template dimulai 0.3 s sebelum R (P lengkap)
+# Jenis beat: 'normal' (sinus), 'no_p' (AF, tanpa gelombang P), 'wide' (ventrikel:
+# PVC/VT, QRS lebar tanpa P, T berlawanan arah)
+BEAT_KINDS = {
+    'normal': BEAT_WAVES,
+    'no_p': BEAT_WAVES[1:],
+    'wide': (
+        ('Q', -0.05, 0.030, -0.30),
+        ('R', 0.00, 0.040, 1.40),
+        ('S', 0.08, 0.035, -0.60),
+        ('T', 0.30, 0.070, -0.45),
+    ),
+}
+
+
+def beat_template(heart_rate, sampling_rate, kind='normal'):
+    """Satu beat lead II (mV) untuk HR tertentu, dimulai BEAT_PRE detik sebelum R"""
+    waves = BEAT_KINDS[kind]
+    scale = np.sqrt(60.0 / heart_rate)
+    t_wave = waves[-1]
+    end = t_wave[1] * scale + 4 * t_wave[2] * scale
+    t = np.arange(int((BEAT_PRE + end) * sampling_rate)) / sampling_rate - BEAT_PRE
+    beat = np.zeros(len(t))
+    for name, center, width, amplitude in waves:
+        if name == 'T':
+            center, width = center * scale, width * scale
+        beat += amplitude * np.exp(-0.5 * ((t - center) / width) ** 2)
+    return beat
+
+
+# Library ritme: parameter default, bisa ditimpa per langkah skenario.
+#   heart_rate: bpm (None = pakai BeatStream.heart_rate, mis. HR dari panel);
+#   irregularity: variasi RR acak +-fraksi (AF); fibrillation: amplitudo gelombang f (mV);
+#   pvc_rate: peluang beat berikutnya PVC (coupling 0.6 RR, pause kompensasi);
+#   lead_off: sinyal diganti saturasi +-5 mV dengan noise (elektroda lepas)
+RHYTHMS = {
+    'normal': {'heart_rate': None},
+    'brady': {'heart_rate': 40},
+    'tachy': {'heart_rate': 140},
+    'af': {'heart_rate': 110, 'irregularity': 0.3, 'fibrillation': 0.05},
+    'pvc': {'heart_rate': 75, 'pvc_rate': 0.15},
+    'vt': {'heart_rate': 180},
+    'asystole': {'heart_rate': 0},
+    'lead_off': {'heart_rate': None, 'lead_off': True},
+}
+
+# Arah vektor gelombang f (AF) pada bidang frontal: sumbu lead II (60 derajat)
+F_WAVE_AXIS = np.array([np.cos(np.radians(60)), np.sin(np.radians(60))])
+
+
+class Scenario:
+    """Jadwal ritme: daftar (ritme, durasi detik, parameter) diputar berurutan
+
+    `Scenario.parse('normal:60,af:300,vt:20')` untuk spesifikasi singkat
+    (env/CLI). loop=True: kembali ke langkah pertama setelah langkah terakhir.
+    """
+
+    def __init__(self, steps, loop=True):
+        self.steps = []
+        for step in steps:
+            rhythm, duration = step[0], float(step[1])
+            if rhythm not in RHYTHMS:
+                raise ValueError(f"Ritme tidak dikenal: {rhythm}")
+            self.steps.append((rhythm, duration, dict(step[2]) if len(step) > 2 else {}))
+        self.loop = loop
+        self.total = sum(duration for _, duration, _ in self.steps)
+
+    @classmethod
+    def parse(cls, spec, loop=True):
+        steps = []
+        for item in spec.split(','):
+            rhythm, _, duration = item.strip().partition(':')
+            steps.append((rhythm, float(duration or 60)))
+        return cls(steps, loop)
+
+    def at(self, seconds):
+        """(ritme, parameter) pada detik ke-`seconds` sejak mulai"""
+        if self.loop and self.total:
+            seconds %= self.total
+        for rhythm, duration, params in self.steps:
+            if seconds < duration:
+                return rhythm, params
+            seconds -= duration
+        rhythm, _, params = self.steps[-1]
+        return rhythm, params
+
+
+class BeatStream:
+    """Generator ECG streaming multi-lead dari template beat per interval RR
+
+    Beat (template per jenis beat dan HR, di-cache per bpm bulat) ditambahkan
+    overlap-add pada posisi beat berikutnya; RR = 60 / HR dengan variasi kecil.
+    `heart_rate` boleh diubah kapan saja, berlaku mulai beat berikutnya.
+    Ritme (RHYTHMS) dipilih lewat `set_rhythm` atau `scenario` (Scenario,
+    dicek tiap beat). Memori konstan: hanya blok yang belum dibaca dan ekor
+    beat terakhir, jadi bisa membuat data berjam-jam lebih cepat dari real time.
+    Tiap lead dibaca terpisah lewat `read(lead, count)` dengan posisinya sendiri;
+    lead yang tertinggal lebih dari satu blok (>= 1 detik) dilompati ke depan.
+    """
+
+    def __init__(self, sampling_rate, leads=('I', 'II', 'III'), heart_rate=72,
+                 variability=0.03, noise=0.02, seed=None, scenario=None):
+        self.sampling_rate = sampling_rate
+        self.leads = tuple(leads)
+        self.matrix = lead_matrix(self.leads)
+        self.heart_rate = heart_rate
+        self.variability = variability
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self.scenario = scenario
+        self.templates = {}
+        self.position = 0             # total sampel yang sudah dibuat
+        self.next_beat = 0            # sampel sampai awal beat berikutnya
+        self.next_kind = 'normal'
+        self.pvc_pause = False
+        self.f_phase = 0.0            # fase gelombang f (AF), bersambung antar blok
+        self.drift = np.zeros(len(self.leads))  # level rail per lead saat lead off
+        self.tail = np.zeros((len(self.leads), 0))
+        self.block = np.zeros((len(self.leads), 0))
+        self.offsets = [0] * len(self.leads)
+        self.set_rhythm('normal')
+
+    def set_rhythm(self, rhythm, **params):
+        self.rhythm = rhythm
+        self.params = {**RHYTHMS[rhythm], **params}
+
+    def template(self, heart_rate, kind='normal'):
+        """Template (n_lead, n) untuk HR (dibulatkan ke bpm), diproyeksi sekali dari vektor jantung"""
+        heart_rate = int(round(min(max(heart_rate, 20), 300)))
+        key = (kind, heart_rate)
+        if key not in self.templates:
+            beat = beat_template(heart_rate, self.sampling_rate, kind)
+            self.templates[key] = project_leads(
+                cardiac_vector(beat, self.sampling_rate), self.leads)
+        return self.templates[key]
+
+    def current_rate(self):
+        rate = self.params.get('heart_rate')
+        return self.heart_rate if rate is None else rate
+
+    def schedule(self, rate):
+        """Jenis beat ini dan RR (detik) sampai beat berikutnya sesuai ritme"""
+        rhythm, params = self.rhythm, self.params
+        kind = self.next_kind
+        self.next_kind = 'normal'
+        rr = 60.0 / rate
+        if rhythm == 'af':
+            kind = 'no_p'
+            rr *= 1 + params['irregularity'] * self.rng.uniform(-1, 1)
+        elif rhythm == 'vt':
+            kind = 'wide'
+            rr *= 1 + 0.02 * self.rng.standard_normal()
+        else:
+            rr *= 1 + self.variability * self.rng.standard_normal()
+            if self.pvc_pause:
+                # Pause kompensasi setelah PVC
+                rr *= 1.4
+                self.pvc_pause = False
+            elif self.rng.random() < params.get('pvc_rate', 0):
+                rr *= 0.6
+                self.next_kind = 'wide'
+                self.pvc_pause = True
+        return kind, rr
+
+    def generate(self, count):
+        """`count` sampel berikutnya untuk semua lead, (n_lead, count)"""
+        longest = len(self.template(20, 'wide')[0])
+        out = np.zeros((len(self.leads), count + longest))
+        out[:, :self.tail.shape[1]] += self.tail
+        if self.scenario is not None:
+            rhythm, params = self.scenario.at(self.position / self.sampling_rate)
+            self.set_rhythm(rhythm, **params)
+        while self.next_beat < count:
+            if self.scenario is not None:
+                rhythm, params = self.scenario.at((self.position + self.next_beat) / self.sampling_rate)
+                self.set_rhythm(rhythm, **params)
+            rate = self.current_rate()
+            if rate and rate > 0:
+                kind, rr = self.schedule(rate)
+                beat = self.template(rate, kind)
+                start = int(self.next_beat)
+                out[:, start:start + beat.shape[1]] += beat
+            else:
+                rr = 0.25  # HR 0 (asistol): tidak ada beat, cek lagi tiap 0.25 detik
+            self.next_beat += max(rr, 0.15) * self.sampling_rate
+        self.next_beat -= count
+        self.tail = out[:, count:]
+        block = out[:, :count]
+
+        fibrillation = self.params.get('fibrillation')
+        if fibrillation:
+            # Gelombang f ~6 Hz sebagai vektor atrium (searah lead II), fase bersambung
+            # antar blok; diproyeksi seperti beat agar hubungan Einthoven tetap berlaku
+            phase = self.f_phase + 2 * np.pi * 6.0 * np.arange(count) / self.sampling_rate
+            wave = fibrillation * np.sin(phase + 0.5 * np.sin(phase / 7.0))
+            block += np.outer(self.matrix @ F_WAVE_AXIS, wave)
+            self.f_phase = (phase[-1] + 2 * np.pi * 6.0 / self.sampling_rate) % (2 * np.pi * 7.0)
+        if self.params.get('lead_off'):
+            # Elektroda lepas: amplifier saturasi di +-5 mV dengan noise besar, kadang pindah rail
+            flip = self.rng.random(len(self.leads)) < count / (5.0 * self.sampling_rate)
+            self.drift = np.where((self.drift == 0) | flip, self.rng.choice((-5.0, 5.0), len(self.leads)), self.drift)
+            block = np.clip(self.drift[:, None] + 0.5 * self.rng.standard_normal(block.shape), -5.0, 5.0)
+        elif self.noise:
+            # Noise pada vektor jantung (2, n) lalu diproyeksi, bukan per lead
+            block += self.matrix @ (self.noise * self.rng.standard_normal((2, count)))
+        self.position += count
+        return block
+
+    def read(self, lead, count):
+        """`count` sampel berikutnya untuk satu lead; blok baru dibuat saat lead terdepan habis"""
+        index = self.leads.index(lead)
+        start = self.offsets[index]
+        missing = start + count - self.block.shape[1]
+        if missing > 0:
+            # Lead yang tertinggal lebih dari satu blok (mis. channel tidak ditampilkan)
+            # dilompati agar blok tidak tumbuh; lalu buang sampel yang sudah dibaca
+            # semua lead dan tambah blok baru
+            floor = start + count - max(count, self.sampling_rate)
+            self.offsets = [max(offset, floor) for offset in self.offsets]
+            done = min(self.offsets)
+            self.block = np.concatenate((self.block[:, done:], self.generate(missing)), axis=1)
+            self.offsets = [offset - done for offset in self.offsets]
+            start -= done
+        self.offsets[index] = start + count
+        return self.block[index, start:start + count]
+
+
+class QRSDetector:
+    """Deteksi QRS streaming (Pan-Tompkins) untuk satu lead
+
+    Blok sampel diproses dengan state filter yang dibawa antar blok (lfilter
+    zi): bandpass 5-15 Hz, turunan, kuadrat, moving window integration
+    150 ms. Puncak MWI dicari per blok (find_peaks, lookahead 200 ms) lalu
+    diklasifikasikan dengan threshold adaptif SPKI/NPKI dan refractory
+    200 ms; searchback saat RR > 1.66x rata-rata. Biaya per sampel konstan.
+    Puncak di bawah level QRS MIN_QRS_MV selalu noise (asistol tidak
+    terbaca sebagai beat), sampel >= LEAD_OFF_MV menandai elektroda lepas.
+    """
+
+    REFRACTORY = 0.2
+    LOOKAHEAD = 0.2
+    ASYSTOLE = 4.0     # tanpa beat selama ini -> HR 0
+    MIN_QRS_MV = 0.2
+    LEAD_OFF_MV = 4.5
+
+    def __init__(self, sampling_rate):
+        fs = sampling_rate
+        self.sampling_rate = fs
+        b, a = butter(2, [5.0 / (fs / 2), 15.0 / (fs / 2)], btype='band')
+        # Turunan 5 titik dan MWI digabung jadi satu FIR
+        derivative = np.array([1, 2, 0, -2, -1]) * (fs / 8.0)
+        window = max(1, int(round(0.15 * fs)))
+        self.filters = [(b, a), (derivative, [1.0]), (np.ones(window) / window, [1.0])]
+        self.zi = None                      # state filter, dibawa antar blok
+        self.min_peak = self._response(self.MIN_QRS_MV)
+        self.saturated = None               # indeks absolut sampel saturasi terakhir
+        self.lookahead = int(self.LOOKAHEAD * fs)
+        self.refractory = int(self.REFRACTORY * fs)
+        self.history = np.zeros(0)          # MWI yang belum pasti (lookahead)
+        self.history_start = 0              # indeks absolut sampel pertama history
+        self.samples = 0                    # total sampel yang sudah diproses
+        self.spki = 0.0
+        self.npki = 0.0
+        self.last_beat = None               # indeks absolut beat terakhir
+        self.rr = []                        # 8 RR terakhir (sampel)
+        self.noise_peaks = []               # kandidat searchback sejak beat terakhir
+        self.learning = int(2 * fs)         # fase belajar threshold 2 detik pertama
+        self.checked = -1                   # puncak terakhir yang sudah diklasifikasi
+
+    def _response(self, amplitude):
+        """Puncak MWI untuk QRS sintetis setinggi `amplitude` mV (batas bawah threshold)"""
+        t = np.arange(-0.5, 0.5, 1.0 / self.sampling_rate)
+        signal = amplitude * np.exp(-0.5 * (t / 0.012) ** 2)
+        for index, (b, a) in enumerate(self.filters):
+            signal = lfilter(b, a, signal)
+            if index == 1:
+                signal = signal * signal
+        return float(signal.max())
+
+    @property
+    def threshold(self):
+        return max(self.npki + 0.25 * (self.spki - self.npki), self.min_peak)
+
+    @property
+    def lead_off(self):
+        """Sinyal saturasi dalam 1 detik terakhir (elektroda lepas)"""
+        return self.saturated is not None and self.samples - self.saturated < self.sampling_rate
+
+    def process(self, samples):
+        """Proses satu blok; hasil list (indeks sampel beat, RR detik atau None)"""
+        samples = np.asarray(samples, dtype=float)
+        if not len(samples):
+            return []
+        clipped = np.flatnonzero(np.abs(samples) >= self.LEAD_OFF_MV)
+        if len(clipped):
+            self.saturated = self.samples + clipped[-1]
+        if self.zi is None:
+            # Bandpass mulai dari level sampel pertama agar tidak ada transien awal
+            self.zi = [lfilter_zi(b, a) * samples[0] if index == 0 else np.zeros(len(b) - 1)
+                       for index, (b, a) in enumerate(self.filters)]
+        filtered = samples
+        for index, (b, a) in enumerate(self.filters):
+            filtered, self.zi[index] = lfilter(b, a, filtered, zi=self.zi[index])
+            if index == 1:
+                filtered = filtered * filtered
+        self.samples += len(samples)
+
+        mwi = np.concatenate((self.history, filtered))
+        peaks, _ = find_peaks(mwi, distance=self.lookahead)
+        # Puncak final hanya jika sudah ada lookahead penuh setelahnya
+        ready = len(mwi) - self.lookahead
+        beats = []
+        for peak in peaks[peaks < ready]:
+            # Puncak di history bisa muncul lagi, lewati yang sudah pernah diklasifikasi
+            position = self.history_start + peak
+            if position <= self.checked:
+                continue
+            self._classify(position, mwi[peak], beats)
+            self.checked = position
+
+        keep = min(len(mwi), 2 * self.lookahead)
+        self.history_start += len(mwi) - keep
+        self.history = mwi[len(mwi) - keep:]
+        return beats
+
+    def _classify(self, position, value, beats):
+        if position < self.learning:
+            # Fase belajar: ambil level sinyal/noise awal
+            self.spki = max(self.spki, value)
+            self.npki = 0.5 * self.spki
+            return
+        if self.lead_off:
+            return
+        if self.last_beat is not None and position - self.last_beat < self.refractory:
+            return
+        if value > self.threshold:
+            if self.last_beat is not None and self.rr:
+                # Searchback: beat terlewat di antara beat terakhir dan beat ini
+                average = sum(self.rr) / len(self.rr)
+                if position - self.last_beat > 1.66 * average:
+                    missed = [(p, v) for p, v in self.noise_peaks
+                              if v > 0.5 * self.threshold and p - self.last_beat >= self.refractory
+                              and position - p >= self.refractory]
+                    if missed:
+                        p, v = max(missed, key=lambda peak: peak[1])
+                        self.spki = 0.25 * v + 0.75 * self.spki
+                        self._beat(p, beats)
+            self.spki = 0.125 * value + 0.875 * self.spki
+            self._beat(position, beats)
+        else:
+            self.npki = 0.125 * value + 0.875 * self.npki
+            self.noise_peaks.append((position, value))
+            del self.noise_peaks[:-16]
+
+    def _beat(self, position, beats):
+        rr = None
+        if self.last_beat is not None:
+            rr = position - self.last_beat
+            self.rr.append(rr)
+            del self.rr[:-8]
+            rr /= self.sampling_rate
+        self.last_beat = position
+        self.noise_peaks = []
+        beats.append((position, rr))
+
+    @property
+    def rr_interval(self):
+        """RR terakhir (detik) atau None"""
+        return self.rr[-1] / self.sampling_rate if self.rr else None
+
+    @property
+    def heart_rate(self):
+        """HR (bpm) dari rata-rata 8 RR terakhir; 0 jika asistol, None jika belum ada data/lead off"""
+        if self.lead_off:
+            return None
+        if self.last_beat is not None and self.samples - self.last_beat > self.ASYSTOLE * self.sampling_rate:
+            return 0.0
+        if not self.rr:
+            return 0.0 if self.samples > self.ASYSTOLE * self.sampling_rate else None
+        return 60.0 * self.sampling_rate * len(self.rr) / sum(self.rr)
@@ -0,0 +1,125 @@
+"""Instrumentasi timer dan paint: durasi callback, jitter, frame yang terlewat"""
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+
+def _summary(values):
+    if not values:
+        return {'p50': None, 'p99': None, 'max': None}
+    values = np.asarray(values)
+    return {'p50': round(float(np.percentile(values, 50)), 2),
+            'p99': round(float(np.percentile(values, 99)), 2),
+            'max': round(float(values.max()), 2)}
+
+
+class TimerProbe:
+    """Statistik satu timer (atau paint event)
+
+    interval_ms: interval nominal timer; None untuk paint (tanpa jitter).
+    Jitter = |interval aktual - interval nominal| (ms). Untuk
+    timer grafik, interval > 1.5x nominal dihitung sebagai frame terlewat.
+    """
+
+    def __init__(self, name, interval_ms=None, history=600):
+        self.name = name
+        self.interval_ms = interval_ms
+        self.durations = deque(maxlen=history)
+        self.jitter = deque(maxlen=history)
+        self.calls = 0
+        self.dropped = 0
+        self.last_fire = None
+
+    def record(self, fired, duration):
+        """fired: waktu mulai callback (perf_counter), duration: detik"""
+        self.calls += 1
+        self.durations.append(duration * 1000.0)
+        if self.interval_ms and self.last_fire is not None:
+            interval = (fired - self.last_fire) * 1000.0
+            self.jitter.append(abs(interval - self.interval_ms))
+            if interval > 1.5 * self.interval_ms:
+                self.dropped += int(round(interval / self.interval_ms)) - 1
+        self.last_fire = fired
+
+    def stats(self):
+        stats = {'calls': self.calls, 'duration_ms': _summary(self.durations)}
+        if self.interval_ms:
+            stats['interval_ms'] = self.interval_ms
+            stats['jitter_ms'] = _summary(self.jitter)
+            stats['dropped'] = self.dropped
+        return stats
+
+
+class Instrumentation:
+    """Kumpulan probe untuk MainWindow, bisa di-dump ke file"""
+
+    def __init__(self):
+        self.probes = {}
+        self.started = time.time()
+
+    def probe(self, name, interval_ms=None):
+        if name not in self.probes:
+            self.probes[name] = TimerProbe(name, interval_ms)
+        return self.probes[name]
+
+    def pause(self, *names):
+        """Timer sengaja dihentikan; jeda berikutnya tidak dihitung jitter/dropped"""
+        for name in names:
+            if name in self.probes:
+                self.probes[name].last_fire = None
+
+    def wrap(self, name, callback, interval_ms=None):
+        """Bungkus callback timer agar durasi dan jitter-nya tercatat"""
+        probe = self.probe(name, interval_ms)
+
+        def timed(*args):
+            start = time.perf_counter()
+            try:
+                return callback(*args)
+            finally:
+                probe.record(start, time.perf_counter() - start)
+
+        return timed
+
+    def watch_paint(self, name, widget):
+        """Catat durasi paintEvent widget (mis. PlotWidget / GraphicsLayoutWidget)"""
+        probe = self.probe(name)
+        paint_event = widget.paintEvent
+
+        def timed_paint(event):
+            start = time.perf_counter()
+            try:
+                return paint_event(event)
+            finally:
+                probe.record(start, time.perf_counter() - start)
+
+        widget.paintEvent = timed_paint
+
+    def stats(self):
+        return {name: probe.stats() for name, probe in self.probes.items()}
+
+    def report(self):
+        """Ringkasan satu baris per probe, untuk overlay"""
+        lines = []
+        for name, probe in self.probes.items():
+            duration = _summary(probe.durations)
+            line = f"{name}: p50 {duration['p50']} / p99 {duration['p99']} ms"
+            if probe.interval_ms:
+                jitter = _summary(probe.jitter)
+                line += f", jitter p99 {jitter['p99']} ms"
+                if probe.dropped:
+                    line += f", dropped {probe.dropped}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def dump(self, path, extra=None):
+        data = {'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+                'dumped': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'probes': self.stats()}
+        if extra:
+            data.update(extra)
+        with open(path, 'w') as file:
+            json.dump(data, file, indent=2)
+        return path
@@ -0,0 +1,75 @@
+"""Rekaman sintetis skenario ritme untuk uji beban alarm dan penyimpanan
+
+Membuat ECG multi-lead dari ecg_model.BeatStream dengan jadwal ritme
+(Scenario), lebih cepat dari real time, lalu menulisnya sebagai pesan
+waveform MQTT (i16le) ke file rekaman StreamRecorder. File diputar ulang
+lewat ReplaySource seperti rekaman device asli.
+
+Contoh:
+    python simulate_scenario.py --scenario normal:300,af:600,pvc:600,vt:30,asystole:20,lead_off:30 \\
+        --duration 3600 --output recordings/scenario.rec
+    MONITOR_REPLAY_FILE=recordings/scenario.rec MONITOR_REPLAY_SPEED=10 python FINAL_GUI_FUNSIONAL.py
+"""
+import argparse
+import base64
+import json
+import time
+
+import numpy as np
+
+from data_sources import WAVEFORM_TOPIC, StreamRecorder
+from ecg_model import BeatStream, Scenario
+
+# Nama channel (WAVEFORM_CHANNELS di GUI) -> lead ekstremitas
+LEADS = {'ecg1': 'I', 'ecg2': 'II', 'ecg3': 'III', 'avr': 'aVR', 'avl': 'aVL', 'avf': 'aVF'}
+SCALE = 0.001  # mV per LSB, sama dengan format waveform device
+
+
+def write_scenario(path, scenario, duration, sampling_rate=250, block_seconds=0.2,
+                   channels=('ecg1', 'ecg2', 'ecg3'), start=None, seed=None):
+    """Tulis `duration` detik skenario ke `path`; hasil jumlah record"""
+    stream = BeatStream(sampling_rate, [LEADS[name] for name in channels], seed=seed, scenario=scenario)
+    recorder = StreamRecorder(path)
+    start = time.time() if start is None else start
+    block = int(round(block_seconds * sampling_rate))
+    written = 0
+    try:
+        while written < duration * sampling_rate:
+            samples = stream.generate(block)
+            raw = np.clip(np.round(samples / SCALE), -32768, 32767).astype('<i2')
+            message = {
+                'fs': sampling_rate, 'encoding': 'i16le', 'scale': SCALE,
+                'leads': {name: base64.b64encode(raw[index].tobytes()).decode()
+                          for index, name in enumerate(channels)},
+            }
+            written += block
+            # Timestamp = akhir blok, seperti device yang mengirim setelah blok penuh
+            recorder.write(WAVEFORM_TOPIC, json.dumps(message).encode(),
+                           timestamp=start + written / sampling_rate)
+    finally:
+        recorder.close()
+    return recorder.records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', default='normal:60,brady:60,tachy:60,af:120,pvc:120,vt:30,asystole:20,lead_off:30',
+                        help='daftar ritme:detik dipisah koma (lihat ecg_model.RHYTHMS)')
+    parser.add_argument('--duration', type=float, default=3600.0, help='panjang rekaman (detik)')
+    parser.add_argument('--rate', type=int, default=250, help='sampling rate (Hz)')
+    parser.add_argument('--augmented', action='store_true', help='tambahkan aVR/aVL/aVF')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default='recordings/scenario.rec')
+    args = parser.parse_args()
+
+    channels = tuple(LEADS) if args.augmented else ('ecg1', 'ecg2', 'ecg3')
+    started = time.perf_counter()
+    records = write_scenario(args.output, Scenario.parse(args.scenario), args.duration,
+                             sampling_rate=args.rate, channels=channels, seed=args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"{records} record ({args.duration:.0f} s, {len(channels)} lead) ditulis ke {args.output} "
+          f"dalam {elapsed:.1f} s ({args.duration / elapsed:.0f}x real time)")
+
+
+if __name__ == '__main__':
+    main()